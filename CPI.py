@@ -17,6 +17,10 @@ The program has two main parts:
         
         In short, our "Series ID" format is 'CUUR%sSA0' % (areaCode).
         
+        The queried data is saved in 'cpi.sqlite', so only new months are \
+        queried, at most once a day, and the last saved data is used when \
+        the API cannot be reached (see cpiStore.py).
+        
         The BLS did not calculate CPI for all cities but grouped CPIs by \
         region division in the census (northeast, pacific, etc.). However, \
         some cities have their own CPI dataset, maybe because prices there \
@@ -39,6 +43,10 @@ The program has two main parts:
         their corresponding states, the program will also use census.csv downloaded from GitHub
         https://github.com/cphalpert/census-regions/blob/master/us%20census%20bureau%20regions%20and%20divisions.csv
         
+        Both files are parsed once into dictionaries keyed by (CITY, STATE) \
+        and by state code, saved as 'areacode_index.pkl'. Each city is then \
+        found with a dictionary lookup (see resolve_area_codes).
+        
 
     2- Coding the input and comparison methods
     
@@ -49,74 +57,140 @@ The program has two main parts:
     apply it to the formula.
     
 """
+import os
+import pickle
+import numpy as np
 import pandas as pd
-import requests
-import json
-from datetime import datetime
+import cpiStore as cs
+import dataStore as ds
+import profiling as prof
 
-def main():
-    #Part 1-
-    
-    #getting current year so the program can run in perpetuity
-    year = datetime.now().year
+AREA_FILE = 'areacode_main.txt'
+CENSUS_FILE = 'census.csv'
+INDEX_FILE = 'areacode_index.pkl'
+INDEX_VERSION = 2 #changed when the saved index gets new parts, so older saved indexes are rebuilt
+
+def read_area_codes(path = AREA_FILE):
+    #read areacode_main.txt into {region division: area code}, {(CITY, STATE): area code} and {area code: area name}
     
     #read each line in areacode_main.txt into a list of str
     areacode = []
-    with open('areacode_main.txt', 'r') as file:
+    with open(path, 'r') as file:
         for line in file:
-            line = line[:-1].split('\t')
+            line = line.rstrip('\r\n').split('\t')
             areacode.append(line)
 
     #split main list into 2 lists, one for region and one for cities
     regionstr = areacode[1:10]
     citystr = areacode[10:] 
 
-    #read list of region str into a dataframe of region and areacode
-    regionDF = pd.DataFrame(regionstr, columns = areacode[0])
+    #region names and their area code
+    regions = {i[1]: i[0] for i in regionstr}
+    areas = {i[0]: i[1].strip() for i in regionstr + citystr}
 
-    #then clean the columns and set the region names as index for searching with .loc later
-    regionDF.drop(['display_level','selectable','sort_sequence'], axis=1, inplace=True)
-    regionDF.set_index('area_name', inplace=True)
-
-    #create a dataframe for cities' name, their corresponding state, and areacode
-    cities = [] 
+    #cities' name, their corresponding state, and areacode
+    cities = {}
 
     for i in citystr: #spliting each str item in the city list, i will have the format [area_code, area_name]
-        i[1] = i[1].split(',') #results in a list like [area_code, [cities, state]]
-        i[1][0] = i[1][0].split('-') #results in a list of list like [areacode, [[city1, city2], state]]
-        i[1][1] = i[1][1].strip() #removing white spaces from state code (the white space in 'city, state' is splitted with the state)
-        temp = i[1]  #taking the list of city & state out temporarily 
-        if len(temp[0])>1: #if the list has more than 1 city, append each city with the state and area code to the list [[city1, state, area_code], [city2, state, area_code]]
-            for c in temp[0]:
-                cities.append([c,temp[1],i[0]]) 
-        else:
-            cities.append([temp[0][0],temp[1],i[0]]) #if the list has only 1 city, append the city, its state, and area_code
-
-    citiesDF = pd.DataFrame(cities, columns = ['City', 'State', 'Area Code']) #convert list of list into dataframe of cities, their corresponding state, and their area_code
+        names, state = i[1].split(',') #'city1-city2, state'
+        state = state.strip() #removing white spaces from state code (the white space in 'city, state' is splitted with the state)
+        for c in names.split('-'): #an area can have more than 1 city, each city gets the area code
+            cities[(c.upper(), state)] = i[0] #canonical city name and state code as key for search
+    return regions, cities, areas
 
-    #adding canonical city names data for search methods
-    temp = pd.DataFrame(citiesDF['City'].apply(str.upper))
-    temp.rename(columns = {'City':'CITY'}, inplace=True)
-    citiesDF = pd.concat([citiesDF, temp], axis=1)
-    citiesDF.set_index('CITY', inplace=True) #setting canonical city name as index for search 
+def build_area_index(area_path = AREA_FILE, census_path = CENSUS_FILE):
+    '''
+    Build the dictionaries used to find the area code of a city:
+        'cities': {(CITY, STATE): area code} for cities that have their own CPI data
+        'states': {STATE: area code of the census region division containing the state}
+        'areas': {area code: area name} for every area with CPI data
+    '''
+    regions, cities, areas = read_area_codes(area_path)
 
     #read the census.csv file into a dataframe of region and states
-    censusDF = pd.read_csv('census.csv')
-    censusDF.set_index('State Code', inplace=True) #setting state code as index for search 
+    censusDF = pd.read_csv(census_path)
+    states = {code: regions[division] for code, division in zip(censusDF['State Code'], censusDF['Division'])}
+    return {'cities': cities, 'states': states, 'areas': areas}
+
+def load_area_index(path = INDEX_FILE, area_path = AREA_FILE, census_path = CENSUS_FILE):
+    #load the saved area code index, rebuilding it if areacode_main.txt or census.csv changed since it was saved
+    signature = [INDEX_VERSION]
+    for source in (area_path, census_path):
+        stat = os.stat(source)
+        signature.append([stat.st_size, stat.st_mtime_ns])
+    try:
+        with open(path, 'rb') as file:
+            saved = pickle.load(file)
+    except (FileNotFoundError, EOFError, pickle.UnpicklingError):
+        saved = None
+    if saved is not None and saved['sources'] == signature:
+        return saved['index']
+
+    with prof.stage('cpi: build area index'):
+        index = build_area_index(area_path, census_path)
+    with open(path + '.tmp', 'wb') as file:
+        pickle.dump({'sources': signature, 'index': index}, file, protocol = pickle.HIGHEST_PROTOCOL)
+    os.replace(path + '.tmp', path)
+    return index
+
+def resolve_area_codes(index, places):
+    '''
+    Find the area code of each (city, state) pair in places, in the same order.
+    A city without its own CPI data gets the area code of its state's census division, 
+    and a state that is not in the census data gets None.
+    '''
+    cities, states = index['cities'], index['states']
+    codes = []
+    for city, state in places:
+        key = (city.strip().upper(), state.strip().upper())
+        code = cities.get(key) #only matches if both city name and state code match
+        if code is None: #if city doesn't match, use state code to get area code
+            code = states.get(key[1])
+        codes.append(code)
+    return codes
 
-    #function to search for area code
-    def CityorState(userCity, userState):    
+def load_cost_matrix(index):
+    '''
+    Load the latest CPI of every area in areacode_main.txt (queried in as few requests as possible, see cpiStore.py)
+    and compute the relative cost difference between every pair of areas.
+    Returns {'codes': [area codes], 'position': {area code: row}, 'cpi': array, 'matrix': N x N array} where
+    matrix[a, b] = (CPI of b - CPI of a) / CPI of a, and NaN for areas without data.
+    '''
+    codes = sorted(index['areas'])
+    cpi = cs.load_cpi(codes)
+    with prof.stage('cpi: cost matrix', len(codes)):
+        values = np.array([np.nan if cpi[code] is None else cpi[code] for code in codes])
+        matrix = (values[np.newaxis, :] - values[:, np.newaxis]) / values[:, np.newaxis]
+    return {'codes': codes, 'position': {code: i for i, code in enumerate(codes)}, 'cpi': values, 'matrix': matrix}
+
+def has_cpi(costs, code):
+    #True if the area has CPI data in the cost matrix
+    return code in costs['position'] and not np.isnan(costs['cpi'][costs['position'][code]])
+
+def cost_difference(costs, codeA, codeB):
+    #relative cost difference from area A to area B (NaN if one of them has no data)
+    return costs['matrix'][costs['position'][codeA], costs['position'][codeB]]
+
+def rank_areas(costs, origin):
+    #every other area with data and its cost difference from origin, from the cheapest to the most expensive
+    row = costs['matrix'][costs['position'][origin]]
+    order = np.argsort(row, kind = 'stable') #NaN are sorted last
+    return [(costs['codes'][i], float(row[i])) for i in order if not np.isnan(row[i]) and costs['codes'][i] != origin]
+
+#function to search for area code
+def CityorState(index, userCity, userState):
+    result = resolve_area_codes(index, [(userCity, userState)])[0]
+    if result is None:
+        print('Could not find your state in the census data.')
         result = 0
-        for index, row in citiesDF.iterrows():
-            if (index == userCity) and (row['State'] == userState): #only matches if both city name and state code match
-                result = row['Area Code']
-        if result == 0: #if city doesn't match, use state code to get area code
-            if userState in censusDF.index:
-                searchKey = censusDF.loc[userState, 'Division']
-                result = regionDF.loc[searchKey, 'area_code']
-            else:
-                print('Could not find your state in the census data.')
-        return result
+    return result
+
+def main():
+    #Part 1-
+    
+    #the area codes of cities and census region divisions, parsed once from areacode_main.txt and census.csv
+    #and saved as 'areacode_index.pkl' (parsed again only if one of the two files changes)
+    index = ds.get('area_index') #kept in memory for the next time this option is chosen (see dataStore.py)
 
     #Part 2-
 
@@ -131,7 +205,9 @@ def main():
         if len(stateFrom) != 2: #state need to be a 2-character code
             print('You need to enter a 2-character state code. Please try again.')
             continue
-        codeA = CityorState(cityFrom.upper(), stateFrom.upper())
+        codeA = CityorState(index, cityFrom, stateFrom)
+        if codeA == 0: #state not found, ask again
+            continue
         break
 
     while True:
@@ -140,7 +216,9 @@ def main():
         if len(stateTo) != 2:
             print('You need to enter a 2-character state code. Please try again.')
             continue
-        codeB = CityorState(cityTo.upper(), stateTo.upper())
+        codeB = CityorState(index, cityTo, stateTo)
+        if codeB == 0: #state not found, ask again
+            continue
         if cityFrom.upper() == cityTo.upper() and stateFrom.upper() == stateTo.upper(): 
             #check if user enter the same place
             print('You have entered the exact same place... Please try again.')
@@ -149,8 +227,8 @@ def main():
             break
 
     #function to compare CPI, A is city to convert from, B is city to convert to
-    def compare(CityA, CityB):
-        delta = (CityB-CityA)/CityA
+    def compare(codeX, codeY):
+        delta = cost_difference(costs, codeX, codeY)
         if delta < 0:
             conclude = 'more'
         else:
@@ -160,30 +238,25 @@ def main():
     #if the two states are the same census division:
     if codeA == codeB:
         print('\nThere may not be a significant difference in cost of living between %s, %s and %s, %s.' %(cityFrom.title(), stateFrom.upper(), cityTo.title(), stateTo.upper()))
-    else: #querying the data in the last three years
-        headers = {'Content-type': 'application/json'}
-        data = json.dumps({"seriesid": ['CUUR%sSA0' % codeA,'CUUR%sSA0' % codeB],"startyear":str(year-3), "endyear":str(year)})
-        response = requests.post('https://api.bls.gov/publicAPI/v1/timeseries/data/', data=data, headers=headers)
-        if response.status_code == 200:
-            data = json.loads(response.content.decode('utf-8'))
-            
-        results  = data['Results']['series']
+    else: #the cost difference between every pair of areas, computed once from the CPI of every area in the last three years
+        #(all areas are queried together, saved in 'cpi.sqlite' and only queried again once a day, see cpiStore.py)
+        costs = ds.get('cost_matrix')
+        divisionA = index['states'][stateFrom.upper()]
+        divisionB = index['states'][stateTo.upper()]
         
         #handling no data results - the BLS may or may not collect recent data for a certain city
         newCodeA = 0
         newCodeB = 0
         print('')
-        if len(results[0]['data']) == 0: #cityFrom has no data
+        if not has_cpi(costs, codeA): #cityFrom has no data
             print('The Bureau of Labor Statistics did not collect cost of living data for %s, %s in the last three years.' % (cityFrom.title(), stateFrom.upper()))
-            searchKey = censusDF.loc[stateFrom.upper(), 'Division'] #changing the areacode from its city to the areacode of the city's state
-            newCodeA = regionDF.loc[searchKey, 'area_code']
-        if len(results[1]['data']) == 0: #cityTo has no data
+            newCodeA = divisionA #changing the areacode from its city to the areacode of the city's state
+        if not has_cpi(costs, codeB): #cityTo has no data
             print('The Bureau of Labor Statistics did not collect cost of living data for %s, %s in the last three years.' % (cityTo.title(), stateTo.upper()))
-            searchKey = censusDF.loc[stateTo.upper(), 'Division']
-            newCodeB = regionDF.loc[searchKey, 'area_code']
+            newCodeB = divisionB
             
         if (newCodeA != 0) or (newCodeB != 0): #if one of the inputs do have result in data, search by state for that input
-            print('\nBecause of missing data, the program will search by state instead of city, which will take more time.')
+            print('\nBecause of missing data, the program will search by state instead of city.')
             print('Keep in mind that the result now may not be as accurate.\n')
             if newCodeA == 0: #keep the area code for input has data
                 newCodeA = codeA
@@ -192,21 +265,13 @@ def main():
             if newCodeA == newCodeB:
                 print('There may not be a significant difference in cost of living between %s, %s and %s, %s.' %(cityFrom.title(), stateFrom.upper(), cityTo.title(), stateTo.upper()))
             else:
-                headers = {'Content-type': 'application/json'}
-                data = json.dumps({"seriesid": ['CUUR%sSA0' % newCodeA,'CUUR%sSA0' % newCodeB],"startyear":str(year-3), "endyear":str(year)})
-                response = requests.post('https://api.bls.gov/publicAPI/v1/timeseries/data/', data=data, headers=headers)
-                if response.status_code == 200:
-                    data = json.loads(response.content.decode('utf-8'))
-                results  = data['Results']['series']
-                
                 #extracting cityA and cityB's CPIs for comparison
-                CPIA = float(results[0]['data'][0]['value']) 
-                CPIB = float(results[1]['data'][0]['value'])
-                compare(CPIA, CPIB)
+                if not has_cpi(costs, newCodeA) or not has_cpi(costs, newCodeB): #only without an internet connection and saved data
+                    print('No cost of living data is available for these places. Please try again when you are online.')
+                else:
+                    compare(newCodeA, newCodeB)
         else: 
-            CPIA = float(results[0]['data'][0]['value'])
-            CPIB = float(results[1]['data'][0]['value'])
-            compare(CPIA, CPIB)
+            compare(codeA, codeB)
 
 if __name__ == '__main__':
     main()
\ No newline at end of file
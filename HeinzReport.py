@@ -3,207 +3,370 @@ Description: This is the utility program that identifies employers that have hir
 Heinz student recently (2021-2023) based on an input of job title. 
 
 The program contains three main parts:
-    1- Extracting all relevant career outcomes PDFs into a usable dataframe.
+    1- Extracting all relevant career outcomes PDFs into a usable dataframe \
+(the PDFs are downloaded and extracted concurrently, reading only the page with the table). \
+Each PDF and its table are cached separately, so only new or changed reports are extracted again.
     2- Displaying all the employers that hired a Heinz student previously \
-based on an inputted job title.
+based on an inputted job title (any job title containing the input, found \
+through an index of 3-character pieces of the titles).
     3- Allowing the user to save the detailed output to a .csv
 
+The employer list also shows how many visa applications each employer filed in \
+the LCA data used by Option 2 (see employerMatch.py).
+
+The employers found for a job title are saved (see resultCache.py), so a title \
+asked again is answered without loading the data, until the data changes.
+
 '''
 
 import tabula # Download tabula through Anaconda: conda install -c conda-forge tabula-py
 import pandas as pd
 import re
+import os
+import json
+import time
+import heapq
+import hashlib
+import webCache as wc
+import employerMatch as em
+import visaData as vd
+import resultCache as rc
+import dataStore as ds
+import profiling as prof
+from concurrent.futures import ThreadPoolExecutor
 
-def main():
+# Links to Career Outcome Reports, in the order their rows are stacked in 'Heinz_Employment.csv'
+# Columns - Employer, Job Title, City, State, Degree, Year
+REPORT_URLS = [
+    'https://www.heinz.cmu.edu/heinz-shared/_files/img/career-services-pages/employment-reports/mam_may2022.pdf',
+    'https://www.heinz.cmu.edu/heinz-shared/_files/img/career-services-pages/employment-reports/mam-2021-employment-report.pdf',
+
+    'https://www.heinz.cmu.edu/heinz-shared/_files/img/career-services-pages/employment-reports/meim-2021-employment-report.pdf',
+    'https://www.heinz.cmu.edu/heinz-shared/_files/img/career-services-pages/employment-reports/meim_may2022.pdf',
+
+    'https://www.heinz.cmu.edu/heinz-shared/_files/img/career-services-pages/employment-reports/msispm-2021-graduates.pdf',
+    'https://www.heinz.cmu.edu/heinz-shared/_files/img/career-services-pages/employment-reports/msispm-2022-may-graduates.pdf',
+    'https://www.heinz.cmu.edu/heinz-shared/_files/img/career-services-pages/2023-one-pagers/msispm-may-2023-one-pager.pdf',
+
+    'https://www.heinz.cmu.edu/heinz-shared/_files/img/career-services-pages/employment-reports/mism-december-2021-graduates.pdf',
+    'https://www.heinz.cmu.edu/heinz-shared/_files/img/career-services-pages/2022-one-pagers/mism16-f22-final-one-pager-4-6-2023.pdf',
+    'https://www.heinz.cmu.edu/heinz-shared/_files/img/career-services-pages/2023-one-pagers/s23-final-one-pager-mism-bida.9-5-2023.pdf',
+
+    'https://www.heinz.cmu.edu/heinz-shared/_files/img/career-services-pages/employment-reports/mism-bida-december2021-graduates.pdf',
+    'https://www.heinz.cmu.edu/heinz-shared/_files/img/career-services-pages/2022-one-pagers/bida-f22-one-pager-data.pdf',
+
+    'https://www.heinz.cmu.edu/heinz-shared/_files/img/career-services-pages/employment-reports/msppm-s22-outcome-reporting.pdf',
+    'https://www.heinz.cmu.edu/heinz-shared/_files/img/career-services-pages/employment-reports/msppm-2021-employment-report.pdf',
+
+    'https://www.heinz.cmu.edu/heinz-shared/_files/img/career-services-pages/employment-reports/msppm-da_may-2022.pdf',
+    'https://www.heinz.cmu.edu/heinz-shared/_files/img/career-services-pages/employment-reports/msppm-da-2021-employment-report.pdf',
+
+    'https://www.heinz.cmu.edu/heinz-shared/_files/img/career-services-pages/employment-reports/msppm-dc_may2022.pdf',
+    'https://www.heinz.cmu.edu/heinz-shared/_files/img/career-services-pages/employment-reports/msppm-dc-2021-employment-report.pdf',
+]
+
+#number of PDFs downloaded and extracted at the same time
+WORKERS = 8
+
+#Each report is cached on its own in the 'heinz_cache' folder: the downloaded PDF (kept by webCache.py with its
+#ETag/Last-Modified headers, keyed by URL) and its extracted table ('<sha256 of the PDF>.csv', keyed by content).
+#The PDFs are checked for changes every HEINZ_TTL_DAYS days (30 by default).
+CACHE_FOLDER = 'heinz_cache'
+MANIFEST_FILE = os.path.join(CACHE_FOLDER, 'manifest.json')
+HEINZ_TTL = float(os.environ.get('HEINZ_TTL_DAYS', 30)) * 24 * 3600
+
+def read_first_table(path):
+    #only the first page is read, which holds the first table in every report (all pages are read if it has none)
+    #with jpype installed, tabula keeps one JVM running inside Python for all the calls
+    tables = tabula.read_pdf(path, pages = 1, multiple_tables = True)
+    if not tables:
+        tables = tabula.read_pdf(path, pages = 'all', multiple_tables = True)
+    return tables[0]
+
+# Function to extract data from a PDF into a DataFrame using tabula library 
+# Columns 'Employer', 'Job Title', 'City', and 'State/Country'.
+def extract_data(url, path):
+    with prof.stage('heinz: read PDF table', workers = True) as record: #java runs in its own process without jpype
+        df = read_first_table(path)
+        record['rows'] = len(df)
     
-    #Part 1-
+    #add a column for the degree program associated with the PDF (not available in the table)
+    if re.search(r'mam', url) != None:
+        df['Degree'] = ['MAM' for i in range(len(df))]
+    elif re.search(r'meim', url) != None:
+        df['Degree'] = ['MEIM' for i in range(len(df))]
+    elif re.search(r'msispm', url) != None:
+        df['Degree'] = ['MSISPM' for i in range(len(df))]
+    elif re.search(r'bida', url) != None:
+         df['Degree'] = ['MISM BIDA' for i in range(len(df))]
+    elif re.search(r'mism', url) != None:
+         df['Degree'] = ['MISM' for i in range(len(df))]
+    elif re.search(r'msppm-da', url) != None:
+         df['Degree'] = ['MSPPM DA' for i in range(len(df))]
+    elif re.search(r'msppm-dc', url) != None:
+         df['Degree'] = ['MSPPM DC' for i in range(len(df))]
+    elif re.search(r'msdc', url) != None:
+         df['Degree'] = ['MSPPM DC' for i in range(len(df))]
+    elif re.search(r'msppm', url) != None:
+         df['Degree'] = ['MSPPM' for i in range(len(df))]
+    
+    #add a column for the year associated with the PDF (not available in the table)
+    if re.search(r'2022', url) != None:
+        df['Year'] = ['2022' for i in range(len(df))]
+    elif re.search(r'2021', url) != None:
+        df['Year'] = ['2021' for i in range(len(df))]
+    elif re.search(r'2023', url) != None:
+        df['Year'] = ['2023' for i in range(len(df))]
+        
+    # Renaming columns for consistency
+    df.rename(columns = {df.columns[0]: 'Employer', 
+                         df.columns[1]: 'Job Title', 
+                         df.columns[2]: 'City', 
+                         df.columns[3]: 'State/Country'}, 
+                    inplace = True) 
+    
+    # Dropping first row containing column headers
+    df = df.drop(0) 
+    # Dropping missing values
+    df.dropna(inplace = True) 
+    # Resetting DataFrame index
+    df = df.reset_index(drop=True) 
+    return df
+
+def extract_all(urls, paths, pool):
+    #extract the PDFs concurrently; the result keeps the order of urls
+    #the first PDF is extracted alone so the JVM is started once, before the other threads use it
+    return [extract_data(urls[0], paths[0])] + list(pool.map(extract_data, urls[1:], paths[1:]))
+
+def table_path(digest):
+    return os.path.join(CACHE_FOLDER, digest + '.csv')
+
+def fetch_report(url):
+    #download the PDF if it is new or changed, and return the hash of its content
+    content, status = wc.fetch(url, ttl = HEINZ_TTL, folder = CACHE_FOLDER)
+    return hashlib.sha256(content).hexdigest()
 
-    #Check if the user has pre-extracted data, if not extract the data (reduce processing time), if so load the data
+def update_reports(urls, workers = WORKERS):
+    #make sure every report has a cached table, only extracting PDFs whose content has no table yet; returns the hashes
+    with ThreadPoolExecutor(max_workers = workers) as pool:
+        with prof.stage('heinz: check reports', len(urls)):
+            digests = list(pool.map(fetch_report, urls))
+        missing = [(url, digest) for url, digest in zip(urls, digests) if not os.path.exists(table_path(digest))]
+        if missing:
+            ds.say('\nExtracting Heinz career outcome data to your system (%d new or changed report(s)).' % len(missing))
+            ds.say('Do not delete the \'%s\' folder to save time on your next usage.' % CACHE_FOLDER)
+            ds.say('-'*50+ '\n')
+            tables = extract_all([url for url, digest in missing], [wc.body_path(url, CACHE_FOLDER) for url, digest in missing], pool)
+            for (url, digest), df in zip(missing, tables):
+                df.to_csv(table_path(digest) + '.tmp', index=False)
+                os.replace(table_path(digest) + '.tmp', table_path(digest))
+    return digests
+
+def prune_tables(digests):
+    #delete the cached tables of reports that are no longer in the list or whose PDF changed since
+    for name in os.listdir(CACHE_FOLDER):
+        if re.fullmatch(r'[0-9a-f]{64}\.csv', name) and name[:-4] not in digests:
+            os.remove(os.path.join(CACHE_FOLDER, name))
+
+def read_manifest():
     try:
-        all_df = pd.read_csv('Heinz_Employment.csv') 
+        with open(MANIFEST_FILE, 'r') as file:
+            return json.load(file)
+    except (FileNotFoundError, json.JSONDecodeError):
+        return None
+
+def load_heinz_data():
     
-    except FileNotFoundError:  
-        print('\nExtracting Heinz career outcome data to your system.')
-        print('Do not delete \'Heinz_Employment.csv\' to save time on your next usage.')
-        print('-'*50+ '\n')
-        # Columns - Employer, Job Title, City, State, Degree, Year
-        # Defining variables with links to Career Outcome Reports 
-        mam_2022 = 'https://www.heinz.cmu.edu/heinz-shared/_files/img/career-services-pages/employment-reports/mam_may2022.pdf'
-        mam_2021 = 'https://www.heinz.cmu.edu/heinz-shared/_files/img/career-services-pages/employment-reports/mam-2021-employment-report.pdf'
-
-        meim_2022 = 'https://www.heinz.cmu.edu/heinz-shared/_files/img/career-services-pages/employment-reports/meim_may2022.pdf'
-        meim_2021 = 'https://www.heinz.cmu.edu/heinz-shared/_files/img/career-services-pages/employment-reports/meim-2021-employment-report.pdf'
-
-        msispm_2022 = 'https://www.heinz.cmu.edu/heinz-shared/_files/img/career-services-pages/2023-one-pagers/msispm-may-2023-one-pager.pdf'
-        msispm_2021 = 'https://www.heinz.cmu.edu/heinz-shared/_files/img/career-services-pages/employment-reports/msispm-2022-may-graduates.pdf'
-        msispm_2021_may = 'https://www.heinz.cmu.edu/heinz-shared/_files/img/career-services-pages/employment-reports/msispm-2021-graduates.pdf'
-
-        mism_2023 = 'https://www.heinz.cmu.edu/heinz-shared/_files/img/career-services-pages/2023-one-pagers/s23-final-one-pager-mism-bida.9-5-2023.pdf'
-        mism_2022 = 'https://www.heinz.cmu.edu/heinz-shared/_files/img/career-services-pages/2022-one-pagers/mism16-f22-final-one-pager-4-6-2023.pdf'
-        mism_2021 = 'https://www.heinz.cmu.edu/heinz-shared/_files/img/career-services-pages/employment-reports/mism-december-2021-graduates.pdf'
-
-        bida_2022 = 'https://www.heinz.cmu.edu/heinz-shared/_files/img/career-services-pages/2022-one-pagers/bida-f22-one-pager-data.pdf'
-        bida_2021 = 'https://www.heinz.cmu.edu/heinz-shared/_files/img/career-services-pages/employment-reports/mism-bida-december2021-graduates.pdf'
-
-        msppm_2022 = 'https://www.heinz.cmu.edu/heinz-shared/_files/img/career-services-pages/employment-reports/msppm-s22-outcome-reporting.pdf'
-        msppm_2021 = 'https://www.heinz.cmu.edu/heinz-shared/_files/img/career-services-pages/employment-reports/msppm-2021-employment-report.pdf'
-
-        dc_2022 = 'https://www.heinz.cmu.edu/heinz-shared/_files/img/career-services-pages/employment-reports/msppm-dc_may2022.pdf'
-        dc_2021 = 'https://www.heinz.cmu.edu/heinz-shared/_files/img/career-services-pages/employment-reports/msppm-dc-2021-employment-report.pdf'
-
-        da_2022 = 'https://www.heinz.cmu.edu/heinz-shared/_files/img/career-services-pages/employment-reports/msppm-da_may-2022.pdf'
-        da_2021 = 'https://www.heinz.cmu.edu/heinz-shared/_files/img/career-services-pages/employment-reports/msppm-da-2021-employment-report.pdf'
-
-        # Function to extract data from a PDF into a DataFrame using tabula library 
-        # Columns 'Employer', 'Job Title', 'City', and 'State/Country'.
-        def extract_data(url):
-            table = tabula.read_pdf(url, pages = 'all', multiple_tables = True)
-            df = table[0]
-            
-            #add a column for the degree program associated with the PDF (not available in the table)
-            if re.search(r'mam', url) != None:
-                df['Degree'] = ['MAM' for i in range(len(df))]
-            elif re.search(r'meim', url) != None:
-                df['Degree'] = ['MEIM' for i in range(len(df))]
-            elif re.search(r'msispm', url) != None:
-                df['Degree'] = ['MSISPM' for i in range(len(df))]
-            elif re.search(r'bida', url) != None:
-                 df['Degree'] = ['MISM BIDA' for i in range(len(df))]
-            elif re.search(r'mism', url) != None:
-                 df['Degree'] = ['MISM' for i in range(len(df))]
-            elif re.search(r'msppm-da', url) != None:
-                 df['Degree'] = ['MSPPM DA' for i in range(len(df))]
-            elif re.search(r'msppm-dc', url) != None:
-                 df['Degree'] = ['MSPPM DC' for i in range(len(df))]
-            elif re.search(r'msdc', url) != None:
-                 df['Degree'] = ['MSPPM DC' for i in range(len(df))]
-            elif re.search(r'msppm', url) != None:
-                 df['Degree'] = ['MSPPM' for i in range(len(df))]
-            
-            #add a column for the year associated with the PDF (not available in the table)
-            if re.search(r'2022', url) != None:
-                df['Year'] = ['2022' for i in range(len(df))]
-            elif re.search(r'2021', url) != None:
-                df['Year'] = ['2021' for i in range(len(df))]
-            elif re.search(r'2023', url) != None:
-                df['Year'] = ['2023' for i in range(len(df))]
-                
-            # Renaming columns for consistency
-            df.rename(columns = {df.columns[0]: 'Employer', 
-                                 df.columns[1]: 'Job Title', 
-                                 df.columns[2]: 'City', 
-                                 df.columns[3]: 'State/Country'}, 
-                            inplace = True) 
-            
-            # Dropping first row containing column headers
-            df = df.drop(0) 
+    #Part 1-
+
+    #Load the combined data if it was built from the current list of reports and they were checked recently.
+    #Otherwise check each report, extract only the new or changed ones, and combine the cached tables again.
+    #('Heinz_Employment.csv' files from before the cache existed are used as they are.)
+    manifest = read_manifest()
+    saved = os.path.exists('Heinz_Employment.csv')
+    fresh = manifest is not None and manifest['urls'] == REPORT_URLS and time.time() - manifest['checked'] < HEINZ_TTL
+    if saved and (fresh or manifest is None):
+        with prof.stage('heinz: read csv') as record:
+            all_df = pd.read_csv('Heinz_Employment.csv') 
+            record['rows'] = len(all_df)
+        ds.say('\nHeinz career outcome data successfully loaded.')
+        ds.say('-'*50+ '\n')
+        return all_df
+
+    digests = update_reports(REPORT_URLS)
+    if saved and manifest['urls'] == REPORT_URLS and manifest['digests'] == digests: #nothing changed
+        all_df = pd.read_csv('Heinz_Employment.csv')
+    else:
+        # Concatenating the tables of all reports into one
+        with prof.stage('heinz: combine tables') as record:
+            all_df = pd.concat([pd.read_csv(table_path(digest)) for digest in digests], ignore_index=True) 
             # Dropping missing values
-            df.dropna(inplace = True) 
-            # Resetting DataFrame index
-            df = df.reset_index(drop=True) 
-            return df
-
-        # Putting the data in functions and creating DataFrames
-        mam_2022_df = extract_data(mam_2022)
-        mam_2021_df = extract_data(mam_2021)
-        data = [mam_2022_df, mam_2021_df]
-        # Concatenating DataFrames specific to a degree and resetting index
-        mam_df = pd.concat(data, ignore_index=True)  
-
-        meim_2022_df = extract_data(meim_2022)
-        meim_2021_df = extract_data(meim_2021)
-        data = [meim_2021_df, meim_2022_df]
-        meim_df = pd.concat(data, ignore_index=True)  
-
-        msispm_2022_df = extract_data(msispm_2022)
-        msispm_2021_df = extract_data(msispm_2021)
-        msispm_2012m_df = extract_data(msispm_2021_may)
-        data = [msispm_2012m_df, msispm_2021_df, msispm_2022_df]
-        msispm_df = pd.concat(data, ignore_index=True)
-
-        mism_2023_df = extract_data(mism_2023)
-        mism_2022_df = extract_data(mism_2022)
-        mism_2021_df = extract_data(mism_2021)
-        data = [mism_2021_df, mism_2022_df, mism_2023_df]
-        mism_df = pd.concat(data, ignore_index=True)
-
-        bida_2022_df = extract_data(bida_2022)
-        bida_2021_df = extract_data(bida_2021)
-        data = [bida_2021_df, bida_2022_df]
-        bida_df = pd.concat(data, ignore_index=True)
-        
-        msppm_2022_df = extract_data(msppm_2022)
-        msppm_2021_df = extract_data(msppm_2021)
-        data = [msppm_2022_df, msppm_2021_df]
-        msppm_df = pd.concat(data, ignore_index=True)
-
-        dc_2022_df = extract_data(dc_2022)
-        dc_2021_df = extract_data(dc_2021)
-        data = [dc_2022_df, dc_2021_df]
-        dc_df = pd.concat(data, ignore_index=True)
-
-        da_2022_df = extract_data(da_2022)
-        da_2021_df = extract_data(da_2021)
-        data = [da_2022_df, da_2021_df]
-        da_df = pd.concat(data, ignore_index=True)
-
-        all_data = [mam_df, meim_df, msispm_df, mism_df, bida_df, msppm_df, da_df, dc_df]
-
-        # Concatenating degree-wise DataFrames into one
-        all_df = pd.concat(all_data, ignore_index=True) 
-        # Dropping missing values
-        all_df.dropna(inplace = True) 
+            all_df.dropna(inplace = True) 
+            record['rows'] = len(all_df)
         
         #read all data into a .csv 
         all_df.to_csv('Heinz_Employment.csv', index=False) 
-    
+
+    with open(MANIFEST_FILE + '.tmp', 'w') as file:
+        json.dump({'urls': REPORT_URLS, 'digests': digests, 'checked': time.time()}, file, indent = 1)
+    os.replace(MANIFEST_FILE + '.tmp', MANIFEST_FILE)
+    prune_tables(digests)
+    ds.say('\nHeinz career outcome data successfully loaded.')
+    ds.say('-'*50+ '\n')
+    return all_df
+
+def trigrams(text):
+    #every 3-character piece of text
+    return {text[i:i+3] for i in range(len(text) - 2)}
+
+def build_search_index(all_df):
+    '''
+    Build the index used by find_employers, once per loaded dataframe. Returns a dictionary with:
+        'titles': the unique lower-cased job titles
+        'trigrams': {3-character piece: set of ids of the titles containing it}
+        'rows': for each title id, the row positions with that title
+        'records': (Employer, Degree, Job Title, Year) of every row
+        'groups': for each title id, {employer: (row positions, joined degrees, joined job titles, joined years)}
+        'employers': the same for all the rows of each employer, used when a search matches all of them
+    '''
+    index = {'titles': [], 'trigrams': {}, 'rows': [], 'records': [], 'groups': [], 'employers': {}}
+    ids = {}
+    for pos, record in enumerate(zip(all_df['Employer'], all_df['Degree'], all_df['Job Title'], all_df['Year'].astype(str))):
+        index['records'].append(record)
+        title = record[2]
+        if not isinstance(title, str): #missing job titles never match
+            continue
+        key = title.lower()
+        if key not in ids:
+            ids[key] = len(index['titles'])
+            index['titles'].append(key)
+            index['rows'].append([])
+            for gram in trigrams(key):
+                index['trigrams'].setdefault(gram, set()).add(ids[key])
+        index['rows'][ids[key]].append(pos)
+
+    #the rows of each title and of each employer grouped by employer, so a search only has to put the groups of the
+    #matching titles together
+    employers = {}
+    for rows in index['rows']:
+        grouped = {}
+        for pos in rows:
+            grouped.setdefault(index['records'][pos][0], []).append(pos)
+            employers.setdefault(index['records'][pos][0], []).append(pos)
+        index['groups'].append({employer: join_records(index, positions) for employer, positions in grouped.items()})
+    index['employers'] = {employer: join_records(index, sorted(positions)) for employer, positions in employers.items()}
+    return index
+
+def join_records(index, positions):
+    #the positions with the degree, job title and year of those rows joined by commas
+    records = [index['records'][pos] for pos in positions]
+    return (positions, ', '.join(r[1] for r in records), ', '.join(r[2] for r in records), ', '.join(r[3] for r in records))
+
+def matching_titles(index, title):
+    #ids of the job titles that contain title, ignoring case
+    query = title.lower()
+    if len(query) < 3: #too short to have a 3-character piece, so check every unique title
+        candidates = range(len(index['titles']))
     else:
-        print('\nHeinz career outcome data successfully loaded.')
-        print('-'*50+ '\n')
+        postings = sorted((index['trigrams'].get(gram, set()) for gram in trigrams(query)), key = len)
+        candidates = set.intersection(*postings) #titles with every piece of the query, checked below
+    return sorted(title_id for title_id in candidates if query in index['titles'][title_id])
+
+def find_employers(all_df, title, index = None):
+    #return the rows whose job title contains the title (ignoring case), and those rows grouped by employer
+    #(empty if there is no match); pass the index from build_search_index to avoid building it again
+    if index is None:
+        index = build_search_index(all_df)
+    title_ids = matching_titles(index, title)
+    positions = sorted(pos for title_id in title_ids for pos in index['rows'][title_id])
+    matches = all_df.iloc[positions]
+    if matches.empty:
+        return matches, pd.DataFrame(columns = ['Employer', 'Degree', 'Job Title', 'Year'])
+
+    # Put together the precomputed groups of the matching titles. An employer found under several titles uses its
+    # group of all rows if they all match, otherwise its matching rows are joined again in row order
+    grouped = {}
+    for title_id in title_ids:
+        for employer, group in index['groups'][title_id].items():
+            grouped.setdefault(employer, []).append(group)
+    for employer, groups in grouped.items():
+        if len(groups) == 1:
+            grouped[employer] = groups[0]
+        elif sum(len(group[0]) for group in groups) == len(index['employers'][employer][0]):
+            grouped[employer] = index['employers'][employer]
+        else:
+            grouped[employer] = join_records(index, list(heapq.merge(*[group[0] for group in groups])))
+
+    #one row per employer (avoid duplicated records), in alphabetical order
+    result_df = pd.DataFrame([[employer] + list(grouped[employer][1:]) for employer in sorted(grouped)],
+                             columns = ['Employer', 'Degree', 'Job Title', 'Year'])
+    return matches, result_df
+
+def result_files():
+    #the data files the employers of a title are found in (see resultCache.py)
+    return ['Heinz_Employment.csv'] + vd.version_files()
+
+def title_result(title):
+    '''
+    Find the employers for a title and their visa cases, or return the saved result if the title was asked before.
+    Returns a dictionary with:
+        'students_hired': the number of rows matching the title
+        'employers': the matches grouped by employer (see find_employers)
+        'visa_cases': the visa cases of each employer, or None without visa data or matches
+    '''
+    def compute():
+        #the data and the index are loaded once and kept for the next time this option is chosen (see dataStore.py)
+        all_df = ds.get('heinz')
+        heinz_index = ds.get('heinz_index')
+        with prof.stage('heinz: find employers') as record:
+            matches, result_df = find_employers(all_df, title, heinz_index)
+            record['rows'] = len(matches)
+
+        #the number of visa applications each employer filed in the LCA data, if the visa data is in the folder
+        visa_cases = None
+        sponsors = ds.get('sponsors') if not matches.empty else None
+        if sponsors is not None:
+            with prof.stage('heinz: join sponsors', len(result_df)):
+                visa_cases = em.join_employers(result_df['Employer'].tolist(), sponsors)['Visa Cases'].tolist()
+        return {'students_hired': len(matches), 'employers': result_df, 'visa_cases': visa_cases}
+
+    #the title is matched ignoring case, so titles differing only in case share a result
+    return rc.get('heinz', title.lower(), result_files, compute)
+
+def main():
     
     #Part 2-
 
     # Get input from user for desired job title
     title = input("Enter a job title of interest to you: ") 
     
-    # Filter rows based on job titles that match user input, ignoring case and missing values
-    matches = all_df[all_df['Job Title'].str.contains(title, case=False, na=False)]
-    
     #Finding the title in the data
+    result = title_result(title)
+    result_df = result['employers']
 
-    if matches.empty:
+    if result['students_hired'] == 0:
         print('\nNo matches found.')
         print('There may not be any employers on record that hired a Heinz student for the title of %s from 2021 to 2023.' %title)
         print('Navigating back to menu...')
 
     else:
-        # Group records by Employer
-        grouped = matches.groupby('Employer')[['Degree', 'Job Title']].agg(', '.join).reset_index()
-        # Adding Year to grouped
-        grouped['Year'] = matches.groupby('Employer')['Year'].apply(lambda x: ', '.join(x.astype(str))).reset_index()['Year']
-        
-        # Creating set to only include unique companies
-        unique_companies = set()
-        
-        # Iterating through grouped DataFrame
-        for index, row in grouped.iterrows():
-            if row['Employer'] not in unique_companies:
-                unique_companies.add(row['Employer'])
-        
         # Calculating total number of students hired for user's job title
-        total_students_hired = len(matches)
+        total_students_hired = result['students_hired']
         print(f"\nTotal number of students hired for the given job title: {total_students_hired}")
         
-        #Grouping by employers (avoid duplicated records)
-        result_df = grouped[grouped['Employer'].isin(unique_companies)]
-        
         #Printing the list of employers
         
         employers = result_df['Employer'].tolist()
         print('\nEmployers that have hired a Heinz students (employers with a \'*\' hired an international student): ')
         
-        for i in employers:
-            print(i)
+        #the number of visa applications each employer filed in the LCA data, if the visa data is in the folder
+        if result['visa_cases'] is None:
+            for i in employers:
+                print(i)
+        else:
+            print('%-20s   %s' % ('# of visa cases', 'Employer'))
+            for i, cases in zip(employers, result['visa_cases']):
+                print('{:^20d}   {:s}'.format(cases, i))
         
         #Part 3-
     
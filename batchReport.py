@@ -0,0 +1,143 @@
+'''
+Description: This is the program that compiles the Option 1 and Option 2 reports \
+for many job titles at once, without any input() prompts.
+
+Usage:
+    python batchReport.py titles.txt [--out reports] [--format json|csv|both] [--workers N]
+
+'titles.txt' has one job title per line (empty lines are skipped). The Heinz, \
+employment projection, and visa data are loaded once and sent once to each \
+worker process. The titles are split into batches spread across the workers; \
+each batch is matched to the employment projection data in one call, then the \
+reports of its titles are compiled.
+
+The results are saved as:
+    - 'reports.json': one entry per title with all three reports.
+    - 'reports_heinz.csv', 'reports_projection.csv', 'reports_visa.csv': one \
+table per report, with a 'Query' column for the inputted title.
+
+'''
+
+import argparse
+import json
+import os
+from concurrent.futures import ProcessPoolExecutor
+import pandas as pd
+import HeinzReport
+import careerReport
+import titleMatch as tm
+import employerMatch as em
+import visaData as vd
+
+#the data used by report_title, set once in each worker process by init_worker
+worker_data = {}
+
+def init_worker(all_df, heinz_index, proj_data, proj_matcher, title_report, title_index, sponsors):
+    worker_data['all_df'] = all_df
+    worker_data['proj_data'] = proj_data
+    worker_data['proj_matcher'] = proj_matcher
+    worker_data['heinz_index'] = heinz_index
+    worker_data['title_report'] = title_report
+    worker_data['title_index'] = title_index
+    worker_data['sponsors'] = sponsors
+
+def read_titles(path):
+    with open(path, 'r') as file:
+        return [line.strip() for line in file if line.strip()]
+
+def report_title(title, proj_report):
+    #compile the Heinz employer and visa reports for one title (the projection report is done for its whole batch)
+    report = {'title': title, 'projection': proj_report}
+
+    matches, result_df = HeinzReport.find_employers(worker_data['all_df'], title, worker_data['heinz_index'])
+    result_df = result_df.assign(**{'Visa Cases': em.join_employers(result_df['Employer'], worker_data['sponsors'])['Visa Cases'].values})
+    report['heinz'] = {'students_hired': len(matches), 'employers': result_df.to_dict('records')}
+
+    visa_titles = sorted(tm.match_titles(worker_data['title_index'], title))
+    report['visa'] = [dict(worker_data['title_report'][t], title = t) for t in visa_titles]
+    return report
+
+def projection_reports(proj_data, proj_matcher, titles):
+    #match every title to the projection data in one call, then summarize each title's matches
+    reports = []
+    for proj_matches in tm.match_occupations(proj_matcher, titles):
+        try:
+            reports.append(careerReport.projection_report(proj_data, proj_matches))
+        except ValueError:
+            reports.append({'error': 'The source data was coded in unsuported format.'})
+    return reports
+
+def report_titles(titles):
+    #compile the reports of a batch of titles in a worker
+    proj_reports = projection_reports(worker_data['proj_data'], worker_data['proj_matcher'], titles)
+    return [report_title(title, proj_report) for title, proj_report in zip(titles, proj_reports)]
+
+def run_batch(titles, workers = None):
+    #load all the data once and return the list of reports, in the same order as titles
+    all_df = HeinzReport.load_heinz_data()
+    heinz_index = HeinzReport.build_search_index(all_df)
+    proj_data = careerReport.load_projection_data()
+    proj_matcher = tm.load_alias_matcher(proj_data)
+    title_report, title_index = vd.load_visa_report()
+    sponsors = em.load_sponsor_table()
+
+    data = (all_df, heinz_index, proj_data, proj_matcher, title_report, title_index, sponsors)
+    workers = min(len(titles), workers or os.cpu_count() or 1)
+    if workers <= 1:
+        init_worker(*data)
+        return report_titles(titles)
+
+    #the data is sent to each worker once; titles are sent in batches (a few per worker, so a slow batch does not
+    #leave the other workers waiting) to keep the overhead per title low
+    size = -(-len(titles) // (workers * 4))
+    batches = [titles[i:i + size] for i in range(0, len(titles), size)]
+    with ProcessPoolExecutor(max_workers = workers, initializer = init_worker, initargs = data) as pool:
+        return [report for reports in pool.map(report_titles, batches) for report in reports]
+
+def write_json(reports, path):
+    with open(path, 'w') as file:
+        json.dump(reports, file, indent = 1)
+
+def write_csv(reports, prefix):
+    heinz_rows, proj_rows, visa_rows = [], [], []
+    for report in reports:
+        for employer in report['heinz']['employers']:
+            heinz_rows.append(dict(employer, Query = report['title']))
+
+        proj = report['projection']
+        if proj is None:
+            proj_rows.append({'Query': report['title'], 'Error': 'No match'})
+        elif 'error' in proj:
+            proj_rows.append({'Query': report['title'], 'Error': proj['error']})
+        else:
+            proj_rows.append({'Query': report['title'], 'Matched Titles': '; '.join(proj['titles']),
+                              'Average Percent Change': proj['percent_change'], 'Average Openings': proj['openings'],
+                              'Median Wage': proj['median_wage']})
+
+        for visa in report['visa']:
+            visa_rows.append({'Query': report['title'], 'Visa Title': visa['title'], 'Total': visa['total'],
+                              'Certified': visa['certified'], 'Withdrawn': visa['withdrawn'], 'Denied': visa['denied'],
+                              'Top Employers': '; '.join('%s (%d)' % (name, cases) for name, cases in visa['employers'])})
+
+    pd.DataFrame(heinz_rows, columns = ['Query', 'Employer', 'Degree', 'Job Title', 'Year', 'Visa Cases']).to_csv(prefix + '_heinz.csv', index = False)
+    pd.DataFrame(proj_rows, columns = ['Query', 'Matched Titles', 'Average Percent Change', 'Average Openings', 'Median Wage', 'Error']).to_csv(prefix + '_projection.csv', index = False)
+    pd.DataFrame(visa_rows, columns = ['Query', 'Visa Title', 'Total', 'Certified', 'Withdrawn', 'Denied', 'Top Employers']).to_csv(prefix + '_visa.csv', index = False)
+
+def main(argv = None):
+    parser = argparse.ArgumentParser(description = 'Compile Option 1 and Option 2 reports for a file of job titles.')
+    parser.add_argument('titles', help = 'text file with one job title per line')
+    parser.add_argument('--out', default = 'reports', help = 'name of the output files, without extension')
+    parser.add_argument('--format', choices = ('json', 'csv', 'both'), default = 'both')
+    parser.add_argument('--workers', type = int, default = None, help = 'number of worker processes (default: number of cores)')
+    args = parser.parse_args(argv)
+
+    titles = read_titles(args.titles)
+    reports = run_batch(titles, args.workers)
+    if args.format in ('json', 'both'):
+        write_json(reports, args.out + '.json')
+    if args.format in ('csv', 'both'):
+        write_csv(reports, args.out)
+    print('Saved reports for %d titles as \'%s\'.' % (len(reports), args.out))
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,135 @@
+'''
+Description: This is the load test of the HTTP service (see careerService.py), \
+run on synthetic data (see fixtures.py) with a local server standing in for the \
+BLS page and API.
+
+The service is started in its own process, in a new temporary folder with the \
+generated data, and then sent requests from many threads at once: a mix of the \
+three endpoints over a small set of job titles and cities, so that identical \
+requests arrive together as they would from many students.
+
+Usage:
+    python benchmarks/benchService.py [--rows 200000] [--requests 2000] [--concurrency 32] [--out bench_service.json]
+
+The throughput and the latency percentiles are printed and saved as a .json file \
+with the program version (git commit).
+
+'''
+
+import argparse
+import json
+import os
+import platform
+import shutil
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+import numpy as np
+import requests
+import fixtures
+from benchSuite import ROOT, version, make_queries
+
+PLACES = [('Pittsburgh', 'PA'), ('Seattle', 'WA'), ('Boston', 'MA'), ('Springfield', 'IL'), ('Austin', 'TX'), ('Denver', 'CO')]
+
+def make_requests(count, titles, seed = 0):
+    #(endpoint, parameters) of count requests, the titles and places picked so that some are much more common
+    rng = np.random.default_rng(seed + 6)
+    picks = (len(titles) * rng.random(count) ** 2).astype(int)
+    requests_list = []
+    for i, pick in enumerate(picks):
+        kind = i % 3
+        if kind == 0:
+            requests_list.append(('/employers', {'title': titles[pick]}))
+        elif kind == 1:
+            requests_list.append(('/career', {'title': titles[pick]}))
+        else:
+            (city_a, state_a), (city_b, state_b) = PLACES[pick % len(PLACES)], PLACES[(pick + 1) % len(PLACES)]
+            requests_list.append(('/cost', {'from_city': city_a, 'from_state': state_a, 'to_city': city_b, 'to_state': state_b}))
+    return requests_list
+
+def start_service(folder, env):
+    #start careerService.py on a free port with its data already loaded; returns (process, base url)
+    process = subprocess.Popen([sys.executable, os.path.join(ROOT, 'careerService.py'), '--port', '0', '--preload'],
+                               cwd = folder, env = env, stdout = subprocess.PIPE, text = True)
+    for line in process.stdout:
+        if line.startswith('Serving on '):
+            return process, line.split()[-1]
+    raise RuntimeError('The service did not start (exit code %s).' % process.wait())
+
+def run_load(url, requests_list, concurrency):
+    #send the requests from concurrency threads, each with its own keep-alive connection; returns the latencies
+    local = threading.local()
+
+    def send(item):
+        endpoint, params = item
+        if not hasattr(local, 'session'):
+            local.session = requests.Session()
+        session = local.session
+        start = time.perf_counter()
+        response = session.get(url + endpoint, params = params, timeout = 120)
+        return time.perf_counter() - start, response.status_code
+
+    with ThreadPoolExecutor(max_workers = concurrency) as pool:
+        return list(pool.map(send, requests_list))
+
+def main(argv = None):
+    parser = argparse.ArgumentParser(description = 'Load test the HTTP service on synthetic data.')
+    parser.add_argument('--rows', type = int, default = 200000, help = 'number of LCA rows to generate')
+    parser.add_argument('--requests', type = int, default = 2000, help = 'number of requests to send')
+    parser.add_argument('--concurrency', type = int, default = 32, help = 'number of requests sent at once')
+    parser.add_argument('--titles', type = int, default = 50, help = 'number of different job titles asked about')
+    parser.add_argument('--seed', type = int, default = 0)
+    parser.add_argument('--out', default = 'bench_service.json', help = '.json file for the results')
+    args = parser.parse_args(argv)
+
+    out = os.path.abspath(args.out)
+    folder = tempfile.mkdtemp(prefix = 'career_service_')
+    server = process = None
+    try:
+        print('Generating %d LCA rows...' % args.rows)
+        fixtures.write_lca_quarters(folder, args.rows, seed = args.seed)
+        fixtures.make_heinz_data(5000, args.seed).to_csv(os.path.join(folder, 'Heinz_Employment.csv'), index = False)
+        for name in ('areacode_main.txt', 'census.csv'):
+            shutil.copy(os.path.join(ROOT, name), os.path.join(folder, name))
+        server, stub_url = fixtures.start_server(fixtures.projection_page(800, args.seed))
+        env = dict(os.environ, PROJECTION_URL = stub_url + '/projections', BLS_API_URL = stub_url + '/timeseries/data/')
+
+        print('Starting the service...')
+        start = time.perf_counter()
+        process, url = start_service(folder, env)
+        startup = time.perf_counter() - start
+
+        requests_list = make_requests(args.requests, make_queries(args.titles, args.seed), args.seed)
+        start = time.perf_counter()
+        results = run_load(url, requests_list, args.concurrency)
+        elapsed = time.perf_counter() - start
+    finally:
+        if process is not None:
+            process.terminate()
+            process.wait()
+        if server is not None:
+            server.shutdown()
+        shutil.rmtree(folder, ignore_errors = True)
+
+    latencies = np.array([seconds for seconds, status in results])
+    errors = sum(status != 200 for seconds, status in results)
+    summary = {'startup_seconds': startup, 'requests': len(results), 'errors': int(errors), 'seconds': elapsed,
+               'requests_per_second': len(results) / elapsed,
+               'latency_ms': {'p50': float(np.percentile(latencies, 50) * 1000), 'p90': float(np.percentile(latencies, 90) * 1000),
+                              'p99': float(np.percentile(latencies, 99) * 1000), 'max': float(latencies.max() * 1000)}}
+    print('Started (with the data loaded) in %.2f s' % startup)
+    print('%d requests (%d errors) in %.2f s: %.1f requests per second' % (len(results), errors, elapsed, summary['requests_per_second']))
+    print('Latency (ms): p50 %.1f, p90 %.1f, p99 %.1f, max %.1f' % tuple(summary['latency_ms'].values()))
+
+    with open(out, 'w') as file:
+        json.dump({'version': version(), 'date': datetime.now().isoformat(timespec = 'seconds'),
+                   'python': platform.python_version(), 'platform': platform.platform(), 'rows': args.rows,
+                   'concurrency': args.concurrency, 'titles': args.titles, 'seed': args.seed, 'results': summary}, file, indent = 1)
+    print('Saved the results as \'%s\'.' % out)
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,67 @@
+'''
+Description: This is the benchmark that measures how long the program takes to \
+start.
+
+Each measurement runs in a new Python process (so nothing is already imported) \
+from the program folder, and is repeated to report the median:
+    - 'menu': running main.py and quitting at once (option 4), i.e. the time \
+until the menu is usable.
+    - 'import <module>': importing each utility, i.e. the time paid the first \
+time its menu option is chosen.
+
+Usage:
+    python benchmarks/benchStartup.py [--repeat N] [--json results.json]
+
+'''
+
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+import time
+
+#the program folder, one level above this file
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+MODULES = ['HeinzReport', 'careerReport', 'CPI']
+
+def time_menu():
+    #seconds to start main.py, show the menu, and quit
+    start = time.perf_counter()
+    subprocess.run([sys.executable, 'main.py'], cwd = ROOT, input = '4\n', capture_output = True, text = True, check = True)
+    return time.perf_counter() - start
+
+def time_import(module):
+    #seconds to import a module in a new process (measured inside the process, without the interpreter startup)
+    code = 'import time; start = time.perf_counter(); import %s; print(time.perf_counter() - start)' % module
+    result = subprocess.run([sys.executable, '-c', code], cwd = ROOT, capture_output = True, text = True)
+    if result.returncode != 0:
+        return None #a dependency of the module is not installed
+    return float(result.stdout.strip().splitlines()[-1])
+
+def run_benchmark(repeat = 5):
+    #return {measurement: median seconds (None if it could not run)}
+    results = {'menu': statistics.median(time_menu() for i in range(repeat))}
+    for module in MODULES:
+        times = [time_import(module) for i in range(repeat)]
+        results['import ' + module] = None if None in times else statistics.median(times)
+    return results
+
+def main(argv = None):
+    parser = argparse.ArgumentParser(description = 'Measure the startup and import times of the program.')
+    parser.add_argument('--repeat', type = int, default = 5, help = 'number of runs of each measurement')
+    parser.add_argument('--json', help = 'also save the results to this .json file')
+    args = parser.parse_args(argv)
+
+    results = run_benchmark(args.repeat)
+    print('%-25s   %s' % ('Measurement', 'Median seconds'))
+    for name, seconds in results.items():
+        print('%-25s   %s' % (name, 'not available' if seconds is None else '%.3f' % seconds))
+    if args.json:
+        with open(args.json, 'w') as file:
+            json.dump(results, file, indent = 1)
+
+if __name__ == '__main__':
+    main()
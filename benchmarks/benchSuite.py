@@ -0,0 +1,163 @@
+'''
+Description: This is the benchmark of the program's slow steps, run on synthetic \
+data (see fixtures.py) without the real data files or an internet connection.
+
+The program's files are used as they are, in a new temporary folder, with the \
+BLS page and API replaced by a local server. Each step is timed once, in order:
+    - visa: parsing the LCA files and building the title report (first run), \
+then loading them from the cache (next runs)
+    - matching: matching job titles to the visa titles and to the employment \
+projection titles
+    - heinz: loading the Heinz data, building its index, and finding employers
+    - sponsors: building the employer sponsor table and joining it to the Heinz \
+employers
+    - report: compiling and saving the batch reports (see batchReport.py)
+    - cpi: resolving area codes, refreshing the CPI of every area, and comparing \
+areas
+
+The Heinz PDF extraction is not included: it needs the real reports and Java.
+
+Usage:
+    python benchmarks/benchSuite.py [--rows 1000000] [--queries 200] [--out bench_results.json] [--keep]
+
+The results are saved as a .json file with the program version (git commit), so \
+the files of two versions can be compared.
+
+'''
+
+import argparse
+import contextlib
+import io
+import json
+import os
+import platform
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+from datetime import datetime
+import numpy as np
+
+#the program folder, one level above this file
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+import fixtures
+import titleMatch as tm
+import visaData as vd
+import HeinzReport
+import careerReport
+import employerMatch as em
+import batchReport
+import cpiStore as cs
+import CPI
+
+def version():
+    #the git commit of the program, or None outside of a git repository
+    try:
+        return subprocess.run(['git', 'rev-parse', 'HEAD'], cwd = ROOT, capture_output = True, text = True, check = True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+def timed(results, name, function, rows = None):
+    #run function without its printed messages, and record how long it took
+    with contextlib.redirect_stdout(io.StringIO()):
+        start = time.perf_counter()
+        value = function()
+        seconds = time.perf_counter() - start
+    results.append({'stage': name, 'seconds': seconds, 'rows': rows})
+    print('%-40s %10.3f s' % (name, seconds))
+    return value
+
+def make_queries(count, seed = 0):
+    #job titles as users type them: some exact titles, some one or two words
+    rng = np.random.default_rng(seed + 4)
+    titles = fixtures.make_titles(count, seed + 5)
+    return [' '.join(title.lower().split()[:rng.integers(1, 3)]) if i % 2 else title.lower() for i, title in enumerate(titles)]
+
+def run_suite(rows, queries, seed = 0):
+    #generate the data in the current folder and return the list of timed steps
+    results = []
+    queries = make_queries(queries, seed)
+    print('Generating %d LCA rows...' % rows)
+    fixtures.write_lca_quarters('.', rows, seed = seed)
+    fixtures.make_heinz_data(5000, seed).to_csv('Heinz_Employment.csv', index = False)
+    for name in ('areacode_main.txt', 'census.csv'):
+        shutil.copy(os.path.join(ROOT, name), name)
+    server, url = fixtures.start_server(fixtures.projection_page(800, seed))
+    cs.API_URL = url + '/timeseries/data/'
+
+    try:
+        #visa data
+        timed(results, 'visa: ingest (first run)', vd.load_visa_report, rows)
+        title_report, title_index = timed(results, 'visa: load (cached)', vd.load_visa_report, rows)
+
+        #title matching
+        timed(results, 'matching: visa titles', lambda: [tm.match_titles(title_index, q) for q in queries], len(queries))
+        proj_data = timed(results, 'matching: download projection page', lambda: careerReport.load_projection_data(url + '/projections', ttl = 0))
+        proj_matcher = timed(results, 'matching: build projection matcher', lambda: tm.load_alias_matcher(proj_data), len(proj_data))
+        timed(results, 'matching: projection titles (batch)', lambda: tm.match_occupations(proj_matcher, queries), len(queries))
+
+        #Heinz data
+        all_df = timed(results, 'heinz: load', HeinzReport.load_heinz_data)
+        heinz_index = timed(results, 'heinz: build index', lambda: HeinzReport.build_search_index(all_df), len(all_df))
+        timed(results, 'heinz: find employers', lambda: [HeinzReport.find_employers(all_df, q, heinz_index) for q in queries], len(queries))
+
+        #employer sponsors
+        sponsors = timed(results, 'sponsors: build table', em.load_sponsor_table)
+        timed(results, 'sponsors: join employers', lambda: em.join_employers(all_df['Employer'], sponsors), len(all_df))
+
+        #report rendering, as batchReport.run_batch does in one process
+        def render():
+            batchReport.init_worker(all_df, heinz_index, proj_data, proj_matcher, title_report, title_index, sponsors)
+            reports = batchReport.report_titles(queries)
+            batchReport.write_json(reports, 'reports.json')
+            batchReport.write_csv(reports, 'reports')
+        timed(results, 'report: compile and save', render, len(queries))
+
+        #cost of living
+        index = timed(results, 'cpi: build area index', CPI.load_area_index)
+        places = [(city, state) for city, state in index['cities']] + [('Nowhere', state) for state in index['states']]
+        places = places * (10000 // len(places) + 1)
+        timed(results, 'cpi: resolve area codes', lambda: CPI.resolve_area_codes(index, places), len(places))
+        costs = timed(results, 'cpi: refresh all areas', lambda: CPI.load_cost_matrix(index), len(index['areas']))
+        timed(results, 'cpi: load all areas (saved)', lambda: CPI.load_cost_matrix(index), len(index['areas']))
+        codes = costs['codes']
+        pairs = [(codes[i % len(codes)], codes[(i * 7 + 1) % len(codes)]) for i in range(100000)]
+        timed(results, 'cpi: compare pairs', lambda: [CPI.cost_difference(costs, a, b) for a, b in pairs], len(pairs))
+        timed(results, 'cpi: rank all areas', lambda: [CPI.rank_areas(costs, code) for code in codes], len(codes))
+    finally:
+        server.shutdown()
+    return results
+
+def main(argv = None):
+    parser = argparse.ArgumentParser(description = 'Time the slow steps of the program on synthetic data.')
+    parser.add_argument('--rows', type = int, default = 1000000, help = 'number of LCA rows to generate (e.g. 1000000 to 20000000)')
+    parser.add_argument('--queries', type = int, default = 200, help = 'number of job titles to look up')
+    parser.add_argument('--seed', type = int, default = 0)
+    parser.add_argument('--out', default = 'bench_results.json', help = '.json file for the results')
+    parser.add_argument('--keep', action = 'store_true', help = 'keep the temporary folder with the generated data')
+    args = parser.parse_args(argv)
+
+    out = os.path.abspath(args.out)
+    folder = tempfile.mkdtemp(prefix = 'career_bench_')
+    cwd = os.getcwd()
+    os.chdir(folder) #the program reads and writes its files in the current folder
+    try:
+        results = run_suite(args.rows, args.queries, args.seed)
+    finally:
+        os.chdir(cwd)
+        if args.keep:
+            print('The generated data is in %s' % folder)
+        else:
+            shutil.rmtree(folder, ignore_errors = True)
+
+    with open(out, 'w') as file:
+        json.dump({'version': version(), 'date': datetime.now().isoformat(timespec = 'seconds'),
+                   'python': platform.python_version(), 'platform': platform.platform(),
+                   'rows': args.rows, 'queries': args.queries, 'seed': args.seed, 'stages': results}, file, indent = 1)
+    print('Saved the results as \'%s\'.' % out)
+
+if __name__ == '__main__':
+    main()
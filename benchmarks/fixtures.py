@@ -0,0 +1,169 @@
+'''
+Description: This is the helper program that makes synthetic data for the \
+benchmarks (see benchSuite.py), so they run without the real data files or an \
+internet connection.
+
+    - LCA quarter .csv files shaped like the U.S. Department of Labor's (same \
+column names and case status values), with job titles and employer names drawn \
+from a fixed vocabulary so that a few titles and employers are very common and \
+most are rare, as in the real data.
+    - A Heinz career outcome table shaped like 'Heinz_Employment.csv'.
+    - A local web server standing in for the BLS: it serves an employment \
+projection page (with an ETag, answering 304 to conditional requests) and a \
+timeseries API that returns monthly CPI values for any series.
+
+The same seed always gives the same data.
+
+'''
+
+import json
+import zlib
+import threading
+import numpy as np
+import pandas as pd
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+TITLE_WORDS = ['DATA', 'SOFTWARE', 'SENIOR', 'ENGINEER', 'SCIENTIST', 'ANALYST', 'MANAGER', 'DEVELOPER', 'BUSINESS',
+               'SYSTEMS', 'PRODUCT', 'RESEARCH', 'ASSOCIATE', 'PRINCIPAL', 'LEAD', 'CONSULTANT', 'FINANCIAL', 'POLICY',
+               'MACHINE', 'LEARNING', 'CLOUD', 'SECURITY', 'NETWORK', 'DATABASE', 'ADMINISTRATOR', 'ARCHITECT',
+               'QUALITY', 'ASSURANCE', 'PROJECT', 'PROGRAM', 'OPERATIONS', 'MARKETING', 'SALES', 'HEALTH', 'CLINICAL',
+               'STATISTICIAN', 'ECONOMIST', 'ACCOUNTANT', 'AUDITOR', 'DESIGNER', 'PHYSICIAN', 'TEACHER', 'PROFESSOR',
+               'SPECIALIST', 'COORDINATOR', 'DIRECTOR', 'TECHNICAL', 'APPLICATION', 'INFORMATION', 'TECHNOLOGY']
+EMPLOYER_WORDS = ['ACME', 'GLOBAL', 'TECH', 'SYSTEMS', 'HEALTH', 'CAPITAL', 'PARTNERS', 'CONSULTING', 'SOLUTIONS',
+                  'NORTH', 'RIVER', 'BLUE', 'STONE', 'BRIDGE', 'DATA', 'LABS', 'BANK', 'MEDICAL', 'UNIVERSITY', 'GROUP']
+EMPLOYER_SUFFIXES = ['INC', 'LLC', 'CORP', 'L.L.C.', 'CORPORATION', 'LTD', 'INC.', '']
+STATUSES = ['Certified', 'Certified - Withdrawn', 'Withdrawn', 'Denied']
+STATUS_WEIGHTS = [0.85, 0.06, 0.05, 0.04]
+STATES = ['PA', 'NY', 'CA', 'TX', 'WA', 'IL', 'MA', 'NJ', 'GA', 'OH']
+DEGREES = ['MISM', 'MSPPM', 'MSHCA', 'MSISPM', 'MAM', 'MSPPM-DA', 'MISM-BIDA']
+
+def make_titles(count, seed = 0):
+    #count different job titles of 1 to 4 words
+    rng = np.random.default_rng(seed)
+    titles = set()
+    while len(titles) < count:
+        titles.add(' '.join(rng.choice(TITLE_WORDS, rng.integers(1, 5), replace = False)))
+    return sorted(titles)
+
+def make_employers(count, seed = 0):
+    #count employer names; the same company often appears with different suffixes
+    rng = np.random.default_rng(seed + 1)
+    names = []
+    for i in range(count):
+        words = ' '.join(rng.choice(EMPLOYER_WORDS, 2, replace = False))
+        names.append(('%s %d %s' % (words, i // 3, rng.choice(EMPLOYER_SUFFIXES))).strip())
+    return names
+
+def skewed_choice(rng, values, size):
+    #pick values so that the first ones are picked much more often than the last ones
+    positions = (len(values) * rng.random(size) ** 3).astype(np.int64)
+    return np.asarray(values, dtype = object)[positions]
+
+def write_lca_quarters(folder, rows, quarters = 4, seed = 0, chunk = 500000, titles = 20000, employers = 50000):
+    '''
+    Write rows LCA rows split into quarter files 'LCA_Disclosure_Data_FY2099_Q<n>.csv' in folder.
+    The rows are written in chunks so any number of rows fits in memory. Returns the list of file paths.
+    '''
+    rng = np.random.default_rng(seed)
+    title_list = make_titles(titles, seed)
+    employer_list = make_employers(employers, seed)
+    paths = []
+    for quarter in range(quarters):
+        path = '%s/LCA_Disclosure_Data_FY2099_Q%d.csv' % (folder, quarter + 1)
+        quarter_rows = rows // quarters + (1 if quarter < rows % quarters else 0)
+        for start in range(0, max(quarter_rows, 1), chunk):
+            size = min(chunk, quarter_rows - start)
+            visa_data = pd.DataFrame({
+                'CASE_NUMBER': ['I-200-%05d-%07d' % (quarter, start + i) for i in range(size)],
+                'CASE_STATUS': rng.choice(STATUSES, size, p = STATUS_WEIGHTS),
+                'VISA_CLASS': rng.choice(['H-1B', 'E-3 Australian', 'H-1B1 Singapore'], size, p = [0.95, 0.03, 0.02]),
+                'JOB_TITLE': skewed_choice(rng, title_list, size),
+                'EMPLOYER_NAME': skewed_choice(rng, employer_list, size),
+                'FULL_TIME_POSITION': rng.choice(['Y', 'N'], size, p = [0.97, 0.03]),
+                'EMPLOYER_CITY': rng.choice(['PITTSBURGH', 'NEW YORK', 'SEATTLE', 'AUSTIN', 'CHICAGO'], size),
+                'EMPLOYER_STATE': rng.choice(STATES, size),
+                'WAGE_RATE_OF_PAY_FROM': rng.integers(50000, 250000, size)})
+            visa_data.to_csv(path, mode = 'w' if start == 0 else 'a', header = start == 0, index = False)
+        paths.append(path)
+    return paths
+
+def make_heinz_data(rows, seed = 0):
+    #a Heinz career outcome table with the columns of 'Heinz_Employment.csv'
+    rng = np.random.default_rng(seed + 2)
+    title_list = [title.title() for title in make_titles(2000, seed)]
+    employer_list = [name.title() for name in make_employers(3000, seed)]
+    employers = skewed_choice(rng, employer_list, rows)
+    international = rng.random(rows) < 0.3
+    return pd.DataFrame({'Employer': [e + '*' if flag else e for e, flag in zip(employers, international)],
+                         'Job Title': skewed_choice(rng, title_list, rows),
+                         'City': rng.choice(['Pittsburgh', 'New York', 'Seattle', 'Washington'], rows),
+                         'State/Country': rng.choice(STATES, rows),
+                         'Degree': rng.choice(DEGREES, rows),
+                         'Year': rng.choice([2021, 2022, 2023], rows)})
+
+def projection_page(rows, seed = 0):
+    #an HTML page with the employment projection table, as the BLS page has it (id 'mytable', two header rows)
+    rng = np.random.default_rng(seed + 3)
+    titles = make_titles(rows * 3, seed + 3)
+    header = ['Occupation Title', 'Occupation Type', 'Occupation Code', 'Employment Percent Change, 2022-2032',
+              'Employment Change, 2022-2032', 'Occupational Openings, 2022-2032 Annual Average',
+              'Median Annual Wage 2022', 'Typical Entry-Level Education']
+    lines = ['<html><body><p>Employment Projections</p><table id="mytable"><thead>',
+             '<tr>' + ''.join('<th>%s</th>' % h for h in header) + '</tr>',
+             '<tr>' + ''.join('<th>%s</th>' % h for h in header) + '</tr>', '</thead><tbody>']
+    for i in range(rows):
+        aliases = [t.title() for t in titles[3 * i:3 * i + 3]]
+        name = '%s* %s Show/hide Example Job Titles*%s' % (aliases[0], aliases[1], aliases[2])
+        lines.append('<tr><td>%s</td><td>Line item</td><td>%02d-%04d</td><td>%.1f</td><td>%.1f</td><td>%.1f</td>'
+                     '<td>%d</td><td>Bachelor\'s degree</td></tr>' % (name, i // 1000, i % 10000, rng.normal(3, 8),
+                     rng.normal(5, 20), rng.gamma(2, 10), rng.integers(30000, 200000)))
+    lines.append('</tbody></table></body></html>')
+    return '\n'.join(lines).encode('utf-8')
+
+def cpi_series(series, startyear, endyear):
+    #monthly CPI values of a series, newest first as the API returns them; the same series always has the same values
+    base = 250 + sum(series.encode('utf-8')) % 100
+    data = []
+    for year in range(int(endyear), int(startyear) - 1, -1):
+        for month in range(12, 0, -1):
+            data.append({'year': str(year), 'period': 'M%02d' % month, 'periodName': '',
+                         'value': '%.3f' % (base * (1.03 ** (year - 2020)) + month / 10), 'footnotes': [{}]})
+    return {'seriesID': series, 'data': data}
+
+def start_server(page):
+    '''
+    Start the BLS stand-in on a free local port, on a background thread.
+    GET returns page (the employment projection page) and POST answers like the timeseries API.
+    Returns (server, base url); stop it with server.shutdown().
+    '''
+    etag = '"%08x"' % zlib.crc32(page)
+
+    class Handler(BaseHTTPRequestHandler):
+        def do_GET(self):
+            if self.headers.get('If-None-Match') == etag:
+                self.send_response(304)
+                self.end_headers()
+                return
+            self.send_body(page, 'text/html', {'ETag': etag})
+
+        def do_POST(self):
+            query = json.loads(self.rfile.read(int(self.headers['Content-Length'])))
+            series = [cpi_series(s, query['startyear'], query['endyear']) for s in query['seriesid']]
+            body = json.dumps({'status': 'REQUEST_SUCCEEDED', 'message': [], 'Results': {'series': series}})
+            self.send_body(body.encode('utf-8'), 'application/json')
+
+        def send_body(self, body, content_type, headers = {}):
+            self.send_response(200)
+            self.send_header('Content-Type', content_type)
+            self.send_header('Content-Length', str(len(body)))
+            for key, value in headers.items():
+                self.send_header(key, value)
+            self.end_headers()
+            self.wfile.write(body)
+
+        def log_message(self, *args):
+            pass
+
+    server = ThreadingHTTPServer(('127.0.0.1', 0), Handler)
+    threading.Thread(target = server.serve_forever, daemon = True).start()
+    return server, 'http://127.0.0.1:%d' % server.server_address[1]
@@ -5,8 +5,9 @@ in 2021-2022, median annual wage in 2022, and 2022-2032 employment projection.
  
 
 The program contains two main parts:
-    1- Extract and display employment projection data (web-scraping with BeautifulSoup).
-    2- Extract and display visa sponsorship data (text matching with textdistance library).
+    1- Extract and display employment projection data (web-scraping with BeautifulSoup, \
+refreshed when the BLS page changes).
+    2- Extract and display visa sponsorship data (text matching with textdistance's jaccard similarity, see titleMatch.py).
 
 This program extracts visa data from .csv files included in the unzipped 'Career Outcome' folder.
 Originally, the files for these visa data that we downloaded from the U.S. Department of Labor is in .xlsx format \
@@ -14,145 +15,180 @@ Originally, the files for these visa data that we downloaded from the U.S. Depar
 However, pandas .read_excel function's processing time is signifincantly longer \
 than .read_csv. Therefore, we manually use Excel to save the .xlsx files as \
 .csv files and read these in instead for better processing.
+The .csv files are only parsed on the first run and then saved as a binary \
+cache that loads much faster (see visaData.py).
+Both reports of a job title are saved (see resultCache.py), so a title asked \
+again is answered without loading the data, until the data changes.
     
 '''
 
+import io
+import os
 import pandas as pd
-import textdistance as td 
+import titleMatch as tm
+import visaData as vd
+import webCache as wc
+import dataStore as ds
+import resultCache as rc
+import profiling as prof
 import requests
-from bs4 import BeautifulSoup
+from bs4 import BeautifulSoup, SoupStrainer
 
-def main():
-    
-    int_title = input('Enter a job title of interest to you: ')
-    
-    #Part 1-
-    
-    #Check if the user has pre-extracted data. if not, extract the data. If so, load the data (reduce processing time).
-    try:
-        proj_data = pd.read_csv('employmentprojection.csv')
-    except FileNotFoundError:
-        print('\nScraping employment projection data for 2022-2023...')
-        print('Do not delete \'employmentprojection.csv\' to save time on your next usage.')
-        
-        url = 'https://data.bls.gov/projections/occupationProj' 
-        response = requests.get(url)
-        soup = BeautifulSoup(response.content, 'html.parser')
-        
-        #find the table on the website and scrape it
-        table = soup.find('table', {'id': 'mytable'})
+#the BLS page with the employment projection table, and how often it is checked for updates
+#(7 days by default, can be changed with the PROJECTION_TTL_DAYS environment variable)
+#the PROJECTION_URL environment variable can point to another copy of the page (e.g. a local one for testing)
+PROJECTION_URL = os.environ.get('PROJECTION_URL', 'https://data.bls.gov/projections/occupationProj')
+PROJECTION_TTL = float(os.environ.get('PROJECTION_TTL_DAYS', 7)) * 24 * 3600
 
-        # Extract the HTML table into a Pandas DataFrame
-        df_raw = pd.read_html(str(table))[0]
+def parse_projection_table(content):
+    #find the table on the website and scrape it; the strainer only builds the soup for that table, not the whole page
+    table = BeautifulSoup(content, 'html.parser', parse_only = SoupStrainer('table', {'id': 'mytable'}))
 
-        # List of columns to keep for our utility
-        columns_to_keep = [0, 2, 3, 5, 6, 7]
-        
-        # A new dataframe with the selected columns
-        employment_projection = df_raw.iloc[:, columns_to_keep]
-        
-        # Replace Nan values with 'None Found'
-        proj_data = employment_projection.fillna('None Found')
+    # Extract the HTML table into a Pandas DataFrame
+    df_raw = pd.read_html(io.StringIO(str(table)))[0]
 
-        #changing all column names from complicated tuples to the first str value in each tuple
-        newCol = [proj_data.columns[i][0] for i in range(len(proj_data.columns))]
-        proj_data.columns = newCol
-        
-        proj_data.to_csv('employmentprojection.csv', index = False)
-        
-        print('Scraped successfully.')
-        print('-'*50+ '\n')
-    else:
-        print('\nEmployment projection data successfully loaded.')    
-        print('-'*50+ '\n')
+    # List of columns to keep for our utility
+    columns_to_keep = [0, 2, 3, 5, 6, 7]
     
-    #Matching user's input to the correct row
-
-    rep_list_proj = proj_data['Occupation Title'].tolist() #create a list of occupation title rows
-
-    #There are multiple titles, separated by a '*', in each row of the 'Occupation Title' column so we will split each row into a list of titles
-
-    inter_list_proj = []
-    inter_list_proj_exact = []
-    for i in rep_list_proj:
-        j = i.split('*') #spliting each str of a row into a list of titles
-        temp_dict = {} 
-        for k in j:
-            k = k.replace(' Show/hide Example Job Titles','') #some str will have this unnessary part
-            k = k.strip()
-            #create a temp dict of each title and its similarity index (using textdistance) to the user's input 
-            temp_dict[k] = td.jaccard(k.upper().split(),int_title.upper().split()) 
-        m = max(temp_dict, key=temp_dict.get) # choose title with the most similarity
-        if temp_dict[m] > 0.4: #if the title with the most similarity matches more than 40%
-            inter_list_proj.append(i) #choose all titles in that row
-            inter_list_proj_exact.append(m) #choose that specific matched title 
+    # A new dataframe with the selected columns
+    employment_projection = df_raw.iloc[:, columns_to_keep]
     
-    #Employment projection display
-    if inter_list_proj == []: #if there is no match
-        print('Could not find data of employment projection for your job title.')
-        print('-'*50+ '\n')
-    else: #if there is a match
-    
-        #selecting the entire row in the dataframe that has the matched title into a new dataframe
-        sel_rows = proj_data['Occupation Title'].isin(inter_list_proj) 
-        sel_proj_data = proj_data[sel_rows] 
-        
-        #the scraped data is stored as str so we need to convert some columns into float but values might have NaN or are in weird formats ('>=23,000')
-        try: 
-            sel_proj_data = sel_proj_data.astype({'Employment Percent Change, 2022-2032': float, 'Occupational Openings, 2022-2032 Annual Average': float, 'Median Annual Wage 2022':float})
-        except ValueError:
-            print('The source data was coded in unsuported format. The program was unable to calculate the results.')
-            print('We recommend running this option again and search with a general key word (\'data\' instead of \'data scientist\'.')
-        else:
-        #display the result
-            print('2022-2032 EMPLOYMENT PROJECTION REPORT FOR: ',inter_list_proj_exact)
-            print('\nAverage employment percent change between 2022 and 2032: %.1f' % sel_proj_data['Employment Percent Change, 2022-2032'].mean())
-            print('Average occupational openings between 2022 and 2032: %.1f'% sel_proj_data['Occupational Openings, 2022-2032 Annual Average'].mean())
-            print('Median wage in 2022: ${:<20,.2f}'. format(sel_proj_data['Median Annual Wage 2022'].mean()))
-            print('\n\n')
+    # Replace Nan values with 'None Found'
+    proj_data = employment_projection.fillna('None Found')
 
-    #Part 2- 
+    #changing all column names from complicated tuples to the first str value in each tuple
+    newCol = [proj_data.columns[i][0] for i in range(len(proj_data.columns))]
+    proj_data.columns = newCol
+    return proj_data
+
+def load_projection_data(url = PROJECTION_URL, ttl = PROJECTION_TTL, path = 'employmentprojection.csv'):
     
-    #Check if the user has pre-extracted data. If not, extract the data. If so, load the data (reduce processing time).   
+    #The BLS page is saved with its ETag/Last-Modified headers (see webCache.py). Once the saved copy is older than ttl,
+    #the page is requested again only if it changed, and the table is scraped again only if a new page was downloaded.
+    #Without an internet connection, the previously scraped data is used.
+    saved = os.path.exists(path)
+    if not saved:
+        ds.say('\nScraping employment projection data for 2022-2023...')
+        ds.say('Do not delete \'%s\' to save time on your next usage.' % path)
     try:
-        visa_data = pd.read_csv('visa_data.csv',encoding='latin',index_col = False,usecols=['CASE_STATUS','VISA_CLASS','JOB_TITLE','EMPLOYER_NAME','FULL_TIME_POSITION','EMPLOYER_CITY','EMPLOYER_STATE'],low_memory=False)
-    except FileNotFoundError:
-        print('\nExtracting visa sponsorship data to your system.')
-        print('Do not delete \'visa_data.csv\' to save time on your next usage.')
-        print('-'*50+ '\n')
-        #extract each .csv file
-        visa_data_1 = pd.read_csv('LCA_Disclosure_Data_FY2021_Q1.csv',encoding='latin',index_col = False,usecols=['CASE_STATUS','VISA_CLASS','JOB_TITLE','EMPLOYER_NAME','FULL_TIME_POSITION','EMPLOYER_CITY','EMPLOYER_STATE'],low_memory=False)
-        visa_data_2 = pd.read_csv('LCA_Disclosure_Data_FY2021_Q2.csv',encoding='latin',index_col = False,usecols=['CASE_STATUS','VISA_CLASS','JOB_TITLE','EMPLOYER_NAME','FULL_TIME_POSITION','EMPLOYER_CITY','EMPLOYER_STATE'],low_memory=False)
-        visa_data_3 = pd.read_csv('LCA_Disclosure_Data_FY2021_Q3.csv',encoding='latin',index_col = False,usecols=['CASE_STATUS','VISA_CLASS','JOB_TITLE','EMPLOYER_NAME','FULL_TIME_POSITION','EMPLOYER_CITY','EMPLOYER_STATE'],low_memory=False)
-        visa_data_4 = pd.read_csv('LCA_Disclosure_Data_FY2021_Q4.csv',encoding='latin',index_col = False,usecols=['CASE_STATUS','VISA_CLASS','JOB_TITLE','EMPLOYER_NAME','FULL_TIME_POSITION','EMPLOYER_CITY','EMPLOYER_STATE'],low_memory=False)
-        visa_data_5 = pd.read_csv('LCA_Disclosure_Data_FY2022_Q1.csv',encoding='latin',index_col = False,usecols=['CASE_STATUS','VISA_CLASS','JOB_TITLE','EMPLOYER_NAME','FULL_TIME_POSITION','EMPLOYER_CITY','EMPLOYER_STATE'],low_memory=False)
-        visa_data_6 = pd.read_csv('LCA_Disclosure_Data_FY2022_Q2.csv',encoding='latin',index_col = False,usecols=['CASE_STATUS','VISA_CLASS','JOB_TITLE','EMPLOYER_NAME','FULL_TIME_POSITION','EMPLOYER_CITY','EMPLOYER_STATE'],low_memory=False)
-        visa_data_7 = pd.read_csv('LCA_Disclosure_Data_FY2022_Q3.csv',encoding='latin',index_col = False,usecols=['CASE_STATUS','VISA_CLASS','JOB_TITLE','EMPLOYER_NAME','FULL_TIME_POSITION','EMPLOYER_CITY','EMPLOYER_STATE'],low_memory=False)
-        visa_data_8 = pd.read_csv('LCA_Disclosure_Data_FY2022_Q4.csv',encoding='latin',index_col = False,usecols=['CASE_STATUS','VISA_CLASS','JOB_TITLE','EMPLOYER_NAME','FULL_TIME_POSITION','EMPLOYER_CITY','EMPLOYER_STATE'],low_memory=False)
-
-        #concatinate into one dataframe and save to .csv for future use
-        visa_data = pd.concat([visa_data_1,visa_data_2,visa_data_3,visa_data_4,visa_data_5,visa_data_6,visa_data_7,visa_data_8],axis=1)
-        visa_data.to_csv('visa_data.csv',index = False)
-        print('Extracted successfully.')
-        print('-'*50+ '\n')
+        with prof.stage('projection: fetch page'):
+            content, status = wc.fetch(url, ttl = ttl)
+    except requests.RequestException:
+        if not saved:
+            raise
+        status = 'offline'
+    
+    if status == 'downloaded' or not saved:
+        with prof.stage('projection: parse table') as record:
+            proj_data = parse_projection_table(content)
+            record['rows'] = len(proj_data)
+        proj_data.to_csv(path, index = False)
+        ds.say('\nEmployment projection data scraped successfully.' if saved else 'Scraped successfully.')
+        ds.say('-'*50+ '\n')
     else:
-        print('\nVisa data successfully loaded.')    
-        print('-'*50+ '\n')
+        with prof.stage('projection: read csv') as record:
+            proj_data = pd.read_csv(path)
+            record['rows'] = len(proj_data)
+        ds.say('\nEmployment projection data successfully loaded.')    
+        ds.say('-'*50+ '\n')
     
+    return proj_data
+
+def projection_report(proj_data, proj_matches):
+    '''
+    Summarize the projection rows matched by tm.match_occupations for one title.
+    Returns None if nothing matched, and raises ValueError if the matched rows have values that are not numbers.
+    '''
+    if proj_matches == []: #if there is no match
+        return None
+
+    inter_list_proj = [proj_data['Occupation Title'].iloc[row] for row, alias in proj_matches] #choose all titles in that row
+    inter_list_proj_exact = [alias for row, alias in proj_matches] #choose that specific matched title 
+
+    #selecting the entire row in the dataframe that has the matched title into a new dataframe
+    sel_rows = proj_data['Occupation Title'].isin(inter_list_proj) 
+    sel_proj_data = proj_data[sel_rows] 
     
-    rep_list_visa = visa_data['JOB_TITLE'].values.tolist() #a list of job title
+    #the scraped data is stored as str so we need to convert some columns into float but values might have NaN or are in weird formats ('>=23,000')
+    sel_proj_data = sel_proj_data.astype({'Employment Percent Change, 2022-2032': float, 'Occupational Openings, 2022-2032 Annual Average': float, 'Median Annual Wage 2022':float})
+    return {'titles': inter_list_proj_exact,
+            'percent_change': float(sel_proj_data['Employment Percent Change, 2022-2032'].mean()),
+            'openings': float(sel_proj_data['Occupational Openings, 2022-2032 Annual Average'].mean()),
+            'median_wage': float(sel_proj_data['Median Annual Wage 2022'].mean())}
+
+def result_files():
+    #the data files the reports of a title are computed from (see resultCache.py)
+    return ['employmentprojection.csv'] + vd.version_files()
+
+def title_result(title):
+    '''
+    Compute the employment projection and visa reports of a title, or return the saved result if the title was asked before.
+    Returns a dictionary with:
+        'projection': the projection report (see projection_report), None if nothing matched
+        'unsupported': True if the matched projection rows could not be read as numbers
+        'visa_titles': the set of visa titles matching the title
+        'visa_reports': {visa title: its visa report} for those titles (see visaData.build_title_report)
+    '''
+    def compute():
+        #Part 1-
+
+        proj_data = ds.get('projection') #kept in memory for the next time this option is chosen (see dataStore.py)
+
+        #Matching user's input to the correct row
+
+        #There are multiple titles, separated by a '*', in each row of the 'Occupation Title' column. These are split
+        #into a table of titles once and saved next to 'employmentprojection.csv' (see titleMatch.py).
+        #A row matches if its title with the most similarity to the user's input matches more than 40%.
+        proj_matcher = ds.get('projection_matcher')
+        with prof.stage('projection: match title') as record:
+            proj_matches = tm.match_occupations(proj_matcher, [title])[0]
+            record['rows'] = len(proj_matches)
+        try:
+            proj_report, unsupported = projection_report(proj_data, proj_matches), False
+        except ValueError:
+            proj_report, unsupported = None, True
+
+        #Part 2-
+
+        #Load the visa report for every job title and the index of titles. They are computed once from the LCA .csv files
+        #and updated automatically when quarterly files are added or changed (see visaData.py).
+        title_report, title_index = ds.get('visa_report')
+
+        # Identifying titles in visa data that match user's input (same textdistance jaccard as with projection data)
+        # The index is built over the unique titles so only titles sharing a word with the input are compared
+        with prof.stage('visa: match title') as record:
+            visa_titles = tm.match_titles(title_index, title) #matched job title is a set so there are no repeated titles
+            record['rows'] = len(visa_titles)
+        return {'projection': proj_report, 'unsupported': unsupported, 'visa_titles': visa_titles,
+                'visa_reports': {t: title_report[t] for t in visa_titles}}
 
-    # Identifying titles in visa data that match user's input (similar process with textdistance as with projection data)
+    #both data are matched on the upper-cased words of the title, so titles with the same words share a result
+    return rc.get('career', ' '.join(tm.tokenize(title)), result_files, compute)
+
+def main():
     
-    inter_list_visa = set() #matched job title is a set so there are no repeated titles
+    int_title = input('Enter a job title of interest to you: ')
+    result = title_result(int_title)
     
-    for i in rep_list_visa:
-        i = str(i)
-        if td.jaccard(i.upper().split(),int_title.upper().split()) > 0.4: #compare each job title to the user's input, add to set if match more than 40%
-           i = i.upper().strip()
-           inter_list_visa.add(i)
+    #Employment projection display
+    proj_report = result['projection']
+    if result['unsupported']:
+        print('The source data was coded in unsuported format. The program was unable to calculate the results.')
+        print('We recommend running this option again and search with a general key word (\'data\' instead of \'data scientist\'.')
+    else:
+        if proj_report is None: #if there is no match
+            print('Could not find data of employment projection for your job title.')
+            print('-'*50+ '\n')
+        else:
+        #display the result
+            print('2022-2032 EMPLOYMENT PROJECTION REPORT FOR: ',proj_report['titles'])
+            print('\nAverage employment percent change between 2022 and 2032: %.1f' % proj_report['percent_change'])
+            print('Average occupational openings between 2022 and 2032: %.1f'% proj_report['openings'])
+            print('Median wage in 2022: ${:<20,.2f}'. format(proj_report['median_wage']))
+            print('\n\n')
 
     # Report Summary Output For User
+    inter_list_visa = result['visa_titles']
     
     if len(inter_list_visa) > 0: 
         print('These are the titles that match your input:\n',inter_list_visa) #prints all the titles that matched the input
@@ -160,20 +196,20 @@ def main():
         while True:
             sel_title = input('\nSelect title from above set to view detailed visa report for: ').upper() #allowing the user to choose the best fit title
             
-            visa_data['JOB_TITLE'] = visa_data['JOB_TITLE'].apply(lambda x : str(x).upper())
-            sel_visa_data = visa_data[visa_data['JOB_TITLE'] == sel_title] #selecting an entire row of data based on the user's input
+            sel_report = result['visa_reports'].get(vd.normalize_title(sel_title)) #the precomputed counts for the chosen title
+            if sel_report is None: #a title that is not in the list is looked up in the report of every title
+                sel_report = ds.get('visa_report')[0].get(vd.normalize_title(sel_title))
             
-            if len(sel_visa_data) > 0: #user chose a valid title from the list
+            if sel_report is not None: #user chose a valid title from the list
                 print('\n\n2021-2022 VISA SPONSORSHIP STATUS REPORT FOR %s' % sel_title)
-                print('\nTotal visa cases for this title: ',sel_visa_data['JOB_TITLE'].count())
-                print('Total visa cases certified: ',sel_visa_data[sel_visa_data['CASE_STATUS'] == 'Certified']['JOB_TITLE'].count())
-                print('Total visa cases withdrawn: ',sel_visa_data[sel_visa_data['CASE_STATUS'] == 'Withdrawn']['JOB_TITLE'].count())
-                print('Total visa cases denied: ',sel_visa_data[sel_visa_data['CASE_STATUS'] == 'Denied']['JOB_TITLE'].count())
+                print('\nTotal visa cases for this title: ',sel_report['total'])
+                print('Total visa cases certified: ',sel_report['certified'])
+                print('Total visa cases withdrawn: ',sel_report['withdrawn'])
+                print('Total visa cases denied: ',sel_report['denied'])
                 print('Top employers:')
                 print('%-20s   %s' % ('# of visa sponsored', 'Employer'))
-                emCount = sel_visa_data['EMPLOYER_NAME'].value_counts().nlargest(10) 
-                #above is a Series of employers and total applications they filed, which is equal to how many times their name came up in the data
-                for index, value in emCount.items():
+                #a list of the top employers and total applications they filed, which is equal to how many times their name came up in the data
+                for index, value in sel_report['employers']:
                     print('{:^20d}   {:s}'.format(value, index))
                 break
             else:
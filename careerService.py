@@ -0,0 +1,216 @@
+'''
+Description: This is the program that answers the three menu options over HTTP, \
+so many students can use them at once (e.g. from a web page), without any \
+input() prompts.
+
+Usage:
+    python careerService.py [--host 127.0.0.1] [--port 8080] [--workers N] [--preload]
+
+Endpoints (GET, the answers are JSON):
+    - /employers?title=data scientist: the employers that hired Heinz students \
+for the title, with their visa cases (Option 1)
+    - /career?title=data scientist: the employment projection report and the \
+visa report of every matching visa title (Option 2)
+    - /cost?from_city=Pittsburgh&from_state=PA&to_city=Seattle&to_state=WA: the \
+cost of living comparison (Option 3)
+    - /rank?city=Pittsburgh&state=PA: every area with CPI data, from the \
+cheapest to the most expensive compared to the city
+    - /health: 'ok' once the server is running
+
+The datasets and indexes are loaded once and kept in memory for all requests \
+(see dataStore.py); with --preload they are loaded before the server starts. \
+The server runs on one asyncio event loop, and the pandas work of each request \
+runs on a pool of worker threads so slow requests do not hold up the others. \
+Identical requests that arrive while the first one is still being answered \
+wait for its answer instead of computing it again, and the results of Options 1 \
+and 2 are saved for the next requests of the same title (see resultCache.py).
+
+The BLS page and API can be replaced by local copies with the PROJECTION_URL \
+and BLS_API_URL environment variables (see benchmarks/benchService.py).
+
+'''
+
+import argparse
+import asyncio
+import json
+from concurrent.futures import ThreadPoolExecutor
+from urllib.parse import urlsplit, parse_qs
+import dataStore as ds
+
+#the requests being answered: {(endpoint, parameters): asyncio future}
+in_progress = {}
+
+STATUS_TEXT = {200: 'OK', 400: 'Bad Request', 404: 'Not Found', 405: 'Method Not Allowed', 500: 'Internal Server Error'}
+
+class RequestError(Exception):
+    #an error in the request itself, answered with status 400
+    pass
+
+def get_param(params, name):
+    value = params.get(name, [''])[0].strip()
+    if not value:
+        raise RequestError('Missing parameter \'%s\'.' % name)
+    return value
+
+def employer_report(title):
+    #Option 1: the Heinz employers for a title and their visa cases (saved for the next requests, see resultCache.py)
+    import HeinzReport
+    result = HeinzReport.title_result(title)
+    result_df = result['employers']
+    if result['visa_cases'] is not None:
+        result_df = result_df.assign(**{'Visa Cases': result['visa_cases']})
+    return {'title': title, 'students_hired': result['students_hired'], 'employers': result_df.to_dict('records')}
+
+def career_report(title):
+    #Option 2: the employment projection report and the visa report of every matching visa title
+    import careerReport
+    result = careerReport.title_result(title)
+    projection = result['projection']
+    if result['unsupported']:
+        projection = {'error': 'The source data was coded in unsuported format.'}
+    return {'title': title, 'projection': projection,
+            'visa': [dict(result['visa_reports'][t], title = t) for t in sorted(result['visa_titles'])]}
+
+def cost_report(city_from, state_from, city_to, state_to):
+    #Option 3: the cost of living difference between two places, using the census division of a city without data
+    import CPI
+    index = ds.get('area_index')
+    codes = CPI.resolve_area_codes(index, [(city_from, state_from), (city_to, state_to)])
+    for code, state in zip(codes, (state_from, state_to)):
+        if code is None:
+            raise RequestError('Could not find the state \'%s\' in the census data.' % state)
+    divisions = [index['states'][state_from.upper()], index['states'][state_to.upper()]]
+    costs = ds.get('cost_matrix') #the cost difference between every pair of areas (see CPI.load_cost_matrix)
+
+    used = []
+    for code, division in zip(codes, divisions):
+        used.append(code if CPI.has_cpi(costs, code) else division)
+    if used[0] == used[1]:
+        return {'from': used[0], 'to': used[1], 'percent_difference': None,
+                'note': 'There may not be a significant difference in cost of living.'}
+    if not CPI.has_cpi(costs, used[0]) or not CPI.has_cpi(costs, used[1]):
+        return {'from': used[0], 'to': used[1], 'percent_difference': None, 'note': 'No cost of living data is available.'}
+    cpi = [float(costs['cpi'][costs['position'][code]]) for code in used]
+    return {'from': used[0], 'to': used[1], 'from_area': index['areas'].get(used[0]), 'to_area': index['areas'].get(used[1]),
+            'from_cpi': cpi[0], 'to_cpi': cpi[1], 'percent_difference': float(CPI.cost_difference(costs, used[0], used[1])) * 100,
+            'by_division': [code != use for code, use in zip(codes, used)]}
+
+def rank_report(city, state):
+    #every area with data compared to a place (its census division if the city has no data), cheapest first
+    import CPI
+    index = ds.get('area_index')
+    code = CPI.resolve_area_codes(index, [(city, state)])[0]
+    if code is None:
+        raise RequestError('Could not find the state \'%s\' in the census data.' % state)
+    costs = ds.get('cost_matrix')
+    if not CPI.has_cpi(costs, code):
+        code = index['states'][state.upper()]
+    if not CPI.has_cpi(costs, code):
+        return {'from': code, 'areas': [], 'note': 'No cost of living data is available.'}
+    return {'from': code, 'from_area': index['areas'].get(code),
+            'areas': [{'code': other, 'area': index['areas'].get(other), 'percent_difference': delta * 100}
+                      for other, delta in CPI.rank_areas(costs, code)]}
+
+def parse_request(path, params):
+    #return (function, arguments) for an endpoint; the arguments are normalized so identical requests are coalesced
+    if path == '/employers':
+        return employer_report, (get_param(params, 'title').lower(),)
+    if path == '/career':
+        return career_report, (get_param(params, 'title').upper(),)
+    if path == '/cost':
+        return cost_report, (get_param(params, 'from_city').upper(), get_param(params, 'from_state').upper(),
+                             get_param(params, 'to_city').upper(), get_param(params, 'to_state').upper())
+    if path == '/rank':
+        return rank_report, (get_param(params, 'city').upper(), get_param(params, 'state').upper())
+    return None, None
+
+async def answer(pool, function, args):
+    #run function(*args) on the worker pool, sharing the result with identical requests in progress
+    key = (function.__name__, args)
+    future = in_progress.get(key)
+    if future is None:
+        future = asyncio.get_running_loop().run_in_executor(pool, function, *args)
+        in_progress[key] = future
+        future.add_done_callback(lambda done: in_progress.pop(key, None))
+    return await asyncio.shield(future)
+
+async def route(pool, method, target):
+    #return (status, answer) for a request
+    if method != 'GET':
+        return 405, {'error': 'Only GET requests are answered.'}
+    url = urlsplit(target)
+    if url.path == '/health':
+        return 200, {'status': 'ok'}
+    try:
+        function, args = parse_request(url.path, parse_qs(url.query))
+        if function is None:
+            return 404, {'error': 'Unknown endpoint \'%s\'.' % url.path}
+        return 200, await answer(pool, function, args)
+    except RequestError as error:
+        return 400, {'error': str(error)}
+    except Exception as error: #e.g. a missing data file
+        return 500, {'error': '%s: %s' % (type(error).__name__, error)}
+
+def to_json(value):
+    #numpy numbers (from pandas) are written as plain numbers
+    return json.dumps(value, default = lambda o: o.item() if hasattr(o, 'item') else str(o)).encode('utf-8')
+
+async def handle_connection(pool, reader, writer):
+    #answer the requests of one connection; the connection is kept open between requests (HTTP/1.1 keep-alive)
+    try:
+        while True:
+            request_line = await reader.readline()
+            if not request_line.strip():
+                break
+            method, target, version = request_line.decode('latin-1').split()
+            headers = {}
+            while True:
+                line = await reader.readline()
+                if line in (b'\r\n', b'\n', b''):
+                    break
+                name, value = line.decode('latin-1').split(':', 1)
+                headers[name.strip().lower()] = value.strip()
+            if 'content-length' in headers: #bodies are not used
+                await reader.readexactly(int(headers['content-length']))
+
+            status, result = await route(pool, method, target)
+            body = to_json(result)
+            keep_alive = version == 'HTTP/1.1' and headers.get('connection', '').lower() != 'close'
+            writer.write(('HTTP/1.1 %d %s\r\nContent-Type: application/json\r\nContent-Length: %d\r\nConnection: %s\r\n\r\n'
+                          % (status, STATUS_TEXT[status], len(body), 'keep-alive' if keep_alive else 'close')).encode('latin-1') + body)
+            await writer.drain()
+            if not keep_alive:
+                break
+    except (ConnectionError, asyncio.IncompleteReadError, ValueError):
+        pass #the client closed the connection or sent something that is not HTTP
+    finally:
+        writer.close()
+
+def preload():
+    #load every dataset the endpoints use, so the first requests do not wait for them
+    for name in ('heinz', 'heinz_index', 'sponsors', 'projection', 'projection_matcher', 'visa_report', 'area_index', 'cost_matrix'):
+        ds.get(name)
+
+async def serve(host, port, workers = None, preload_data = False):
+    pool = ThreadPoolExecutor(max_workers = workers)
+    if preload_data:
+        await asyncio.get_running_loop().run_in_executor(pool, preload)
+    server = await asyncio.start_server(lambda reader, writer: handle_connection(pool, reader, writer), host, port)
+    print('Serving on http://%s:%d' % (host, server.sockets[0].getsockname()[1]), flush = True)
+    async with server:
+        await server.serve_forever()
+
+def main(argv = None):
+    parser = argparse.ArgumentParser(description = 'Answer the three menu options over HTTP.')
+    parser.add_argument('--host', default = '127.0.0.1')
+    parser.add_argument('--port', type = int, default = 8080)
+    parser.add_argument('--workers', type = int, default = None, help = 'number of worker threads (default: based on the number of cores)')
+    parser.add_argument('--preload', action = 'store_true', help = 'load all datasets before starting the server')
+    args = parser.parse_args(argv)
+    try:
+        asyncio.run(serve(args.host, args.port, args.workers, args.preload))
+    except KeyboardInterrupt:
+        pass
+
+if __name__ == '__main__':
+    main()
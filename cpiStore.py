@@ -0,0 +1,156 @@
+'''
+Description: This is the helper program that keeps the CPI data queried from the \
+U.S. Bureau of Labor Statistics (BLS) API on disk for the cost-of-living utility \
+(Option 3, see CPI.py).
+
+The monthly values of every 'CUUR%sSA0' series that was queried are saved in a \
+SQLite database, 'cpi.sqlite', with the time each series was last checked.
+
+    - A series checked less than CPI_TTL_DAYS days ago (1 by default) is \
+answered from the database without calling the API.
+    - Otherwise only the years from the last saved month onwards are requested \
+again (the API takes a start and end year, not months), and the new months are \
+added to the database.
+    - Series are requested together, up to 25 in one request and from the \
+earliest year any of them needs, so the data of every area can be refreshed in \
+a few requests (see CPI.load_cost_matrix).
+    - Requests go through one session that keeps its connection open and \
+retries failed requests with a growing wait.
+    - If the API cannot be reached or refuses the request (e.g. the daily limit \
+of queries was reached), the last saved values are used.
+
+'''
+
+import os
+import json
+import time
+import sqlite3
+from datetime import datetime
+import requests
+import profiling as prof
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+
+#the BLS_API_URL environment variable can point to another server (e.g. a local one for testing)
+API_URL = os.environ.get('BLS_API_URL', 'https://api.bls.gov/publicAPI/v1/timeseries/data/')
+STORE_FILE = 'cpi.sqlite'
+CPI_TTL = float(os.environ.get('CPI_TTL_DAYS', 1)) * 24 * 3600
+
+#the CPI is compared over the last YEARS years, as the API queries did before the data was saved
+YEARS = 3
+
+#the most series the API (version 1) accepts in one request
+MAX_SERIES = 25
+
+#one session is kept for all requests so its connection to the API is reused
+session_cache = {}
+
+def get_session():
+    #the shared session, retrying failed requests twice with a growing wait
+    if 'session' not in session_cache:
+        retry = Retry(total = 2, backoff_factor = 0.5, status_forcelist = (429, 500, 502, 503, 504), allowed_methods = None)
+        session = requests.Session()
+        session.mount('https://', HTTPAdapter(max_retries = retry))
+        session.mount('http://', HTTPAdapter(max_retries = retry))
+        session_cache['session'] = session
+    return session_cache['session']
+
+def series_id(code):
+    #the series of CPI not seasonally adjusted, for all items, in the area with this area code
+    return 'CUUR%sSA0' % code
+
+def connect(path = STORE_FILE):
+    conn = sqlite3.connect(path)
+    conn.execute('CREATE TABLE IF NOT EXISTS cpi (series TEXT, year INTEGER, period TEXT, value REAL, '
+                 'PRIMARY KEY (series, year, period))')
+    conn.execute('CREATE TABLE IF NOT EXISTS checked (series TEXT PRIMARY KEY, time REAL)')
+    return conn
+
+def post_series(series, startyear, endyear, session = None):
+    '''
+    Query the API for a list of series between two years.
+    Returns {series: [(year, period, value)]}. Raises requests.RequestException if the API cannot be reached
+    and ValueError if it did not process the request.
+    '''
+    headers = {'Content-type': 'application/json'}
+    data = json.dumps({"seriesid": list(series), "startyear": str(startyear), "endyear": str(endyear)})
+    response = (session or get_session()).post(API_URL, data = data, headers = headers, timeout = 30)
+    response.raise_for_status()
+    data = json.loads(response.content.decode('utf-8'))
+    if data.get('status') != 'REQUEST_SUCCEEDED':
+        raise ValueError(' '.join(data.get('message') or ['The BLS API did not process the request.']))
+
+    results = {}
+    for result in data['Results']['series']:
+        rows = []
+        for item in result['data']:
+            try:
+                rows.append((int(item['year']), item['period'], float(item['value'])))
+            except ValueError: #months without a value ('-')
+                continue
+        results[result['seriesID']] = rows
+    return results
+
+def stale_series(conn, series, ttl = CPI_TTL):
+    #the series that were never checked or were checked more than ttl seconds ago
+    now = time.time()
+    checked = dict(conn.execute('SELECT series, time FROM checked WHERE series IN (%s)' % ','.join('?' * len(series)), series))
+    return [s for s in series if now - checked.get(s, 0) >= ttl]
+
+def start_year(conn, series, year):
+    #the first year to request for a series: the year of its last saved month, or YEARS years ago
+    saved = conn.execute('SELECT MAX(year) FROM cpi WHERE series = ?', (series,)).fetchone()[0]
+    return max(year - YEARS, saved or 0)
+
+def update_series(conn, series, ttl = CPI_TTL, session = None):
+    '''
+    Add the new months of the outdated series to the database.
+    Returns False if the API could not be used (the saved values are used instead), True otherwise.
+    '''
+    year = datetime.now().year
+    series = stale_series(conn, list(dict.fromkeys(series)), ttl)
+    if not series:
+        return True
+    #all series are requested from the earliest year any of them needs, MAX_SERIES at a time; the extra years of
+    #the others are saved again unchanged, but the number of requests (limited per day) is as small as possible
+    startyear = min(start_year(conn, s, year) for s in series)
+
+    for i in range(0, len(series), MAX_SERIES):
+        group = series[i:i + MAX_SERIES]
+        try:
+            with prof.stage('cpi: BLS request', len(group)):
+                results = post_series(group, startyear, year, session)
+        except requests.RequestException:
+            print('\nCould not reach the Bureau of Labor Statistics. The last saved data will be used.')
+            return False
+        except ValueError as error: #e.g. the daily limit of queries was reached
+            print('\n%s The last saved data will be used.' % error)
+            return False
+        now = time.time()
+        with conn:
+            for s in group:
+                conn.executemany('INSERT OR REPLACE INTO cpi VALUES (?, ?, ?, ?)',
+                                 [(s, y, period, value) for y, period, value in results.get(s, [])])
+                conn.execute('INSERT OR REPLACE INTO checked VALUES (?, ?)', (s, now))
+    return True
+
+def latest_values(conn, series):
+    #the most recent monthly value of each series within the last YEARS years (None if there is none)
+    since = datetime.now().year - YEARS
+    values = {}
+    for s in series:
+        row = conn.execute("SELECT value FROM cpi WHERE series = ? AND year >= ? AND period LIKE 'M%' AND period != 'M13' "
+                           'ORDER BY year DESC, period DESC LIMIT 1', (s, since)).fetchone()
+        values[s] = row[0] if row else None
+    return values
+
+def load_cpi(codes, path = STORE_FILE, ttl = CPI_TTL, session = None):
+    #the latest CPI of each area code ({area code: value or None}), updating the saved data first if it is outdated
+    conn = connect(path)
+    try:
+        update_series(conn, [series_id(code) for code in codes], ttl, session)
+        with prof.stage('cpi: read saved values', len(codes)):
+            values = latest_values(conn, [series_id(code) for code in codes])
+    finally:
+        conn.close()
+    return {code: values[series_id(code)] for code in codes}
@@ -0,0 +1,208 @@
+'''
+Description: This is the helper program that keeps the datasets used by the menu \
+options in memory, so going back to the menu and choosing an option again does \
+not load anything from disk.
+
+Each dataset is loaded by get(name) the first time it is needed, and the same \
+object is returned afterwards to every option. The loaded datasets may use up \
+to DATASTORE_BUDGET_MB megabytes (1024 by default, set with the environment \
+variable); past that, the largest datasets are dropped first (the least recently \
+used first when two have the same size) and loaded again if they are needed \
+later. A dataset built from another one (e.g. 'heinz_index' from 'heinz') is \
+dropped with it, so a reloaded dataset is never used with an index of the old one.
+
+The datasets:
+    - 'heinz', 'heinz_index': the Heinz career outcome data and its title search \
+index (Option 1)
+    - 'sponsors': the visa case counts of each employer (Option 1)
+    - 'projection', 'projection_matcher': the employment projection data and its \
+title matcher (Option 2)
+    - 'visa_report': the visa report of every title and the title index (Option 2)
+    - 'area_index', 'cost_matrix': the CPI area codes and the cost difference \
+between every pair of areas (Option 3)
+
+With warm_up(), the datasets are loaded on background threads while the menu \
+waits for the user's choice (see main.py). If an option needs a dataset that is \
+still loading, it waits for that load instead of starting another one. The \
+loading messages of the utilities are printed with say(), which prints nothing \
+on the warm-up threads so they do not mix with the menu; everything else (e.g. \
+the options) prints as usual.
+
+A dataset built from another one loads that one first with get(), so it also \
+waits for it if it is being loaded by another thread. 'visa_report' and \
+'sponsors' both bring the visa cache up to date first, one thread at a time \
+(see visaData.update_cache), so whichever is loaded second waits for the first \
+to finish parsing instead of parsing again.
+
+'''
+
+import os
+import sys
+import threading
+import itertools
+from collections import OrderedDict
+from concurrent.futures import Future
+import profiling as prof
+
+BUDGET = float(os.environ.get('DATASTORE_BUDGET_MB', 1024)) * 1024 * 1024
+
+#the loaded datasets, from the least to the most recently used: {name: (dataset, size in bytes)}
+loaded = OrderedDict()
+
+#the datasets being loaded, by any thread: {name: Future}
+loading = {}
+lock = threading.Lock()
+
+#the datasets built from each dataset, dropped together with it
+DEPENDENTS = {'heinz': ['heinz_index'], 'projection': ['projection_matcher'], 'area_index': ['cost_matrix']}
+
+#number of items of a dict or list measured by data_size
+SAMPLE = 100
+
+#set on the warm-up threads: local.quiet is True while they load
+local = threading.local()
+
+#the datasets loaded by warm_up, each list in order on its own thread (the CPI cost matrix is left out
+#because it queries the BLS API for every area)
+WARM_UP = [['heinz', 'heinz_index'], ['projection', 'projection_matcher'], ['visa_report', 'sponsors'], ['area_index']]
+WARM_UP_THREAD = 'warm-up'
+
+#the utilities are imported inside the loaders so importing this file stays fast (see main.py)
+def load_heinz():
+    import HeinzReport
+    return HeinzReport.load_heinz_data()
+
+def load_heinz_index():
+    import HeinzReport
+    return HeinzReport.build_search_index(get('heinz'))
+
+def load_sponsors():
+    import employerMatch as em
+    import visaData as vd
+    if not vd.source_files(): #None without visa data
+        return em.load_sponsor_table(build = False)
+    #only brings the visa cache up to date (or waits for the thread doing it), the title report is not loaded
+    return em.load_sponsor_table()
+
+def load_projection():
+    import careerReport
+    return careerReport.load_projection_data()
+
+def load_projection_matcher():
+    import titleMatch as tm
+    return tm.load_alias_matcher(get('projection'))
+
+def load_visa_report():
+    import visaData as vd
+    return vd.load_visa_report()
+
+def load_area_index():
+    import CPI
+    return CPI.load_area_index()
+
+def load_cost_matrix():
+    import CPI
+    return CPI.load_cost_matrix(get('area_index'))
+
+LOADERS = {'heinz': load_heinz, 'heinz_index': load_heinz_index, 'sponsors': load_sponsors,
+           'projection': load_projection, 'projection_matcher': load_projection_matcher,
+           'visa_report': load_visa_report, 'area_index': load_area_index, 'cost_matrix': load_cost_matrix}
+
+def data_size(value):
+    '''
+    Approximate memory used by a dataset in bytes. Dataframes and arrays are measured as a whole; for the dicts,
+    lists and tuples holding them, only the first SAMPLE items are measured and the rest are counted as the same
+    average size, so a report with millions of entries is measured in about the same time as a small one.
+    '''
+    if hasattr(value, 'memory_usage'): #pandas dataframe or series
+        usage = value.memory_usage(deep = True)
+        return int(usage.sum()) if hasattr(usage, 'sum') else int(usage)
+    if hasattr(value, 'nbytes'): #numpy array
+        return int(value.nbytes)
+    size = sys.getsizeof(value)
+    if isinstance(value, dict):
+        sample = [data_size(k) + data_size(v) for k, v in itertools.islice(value.items(), SAMPLE)]
+    elif isinstance(value, (list, tuple, set, frozenset)):
+        sample = [data_size(v) for v in itertools.islice(value, SAMPLE)]
+    else:
+        return size
+    if sample:
+        size += int(sum(sample) / len(sample) * len(value))
+    return size
+
+def group(name):
+    #a dataset and the datasets built from it
+    return [name] + [dependent for dependent in DEPENDENTS.get(name, []) if dependent in loaded]
+
+def evict(keep):
+    #drop the largest datasets with the ones built from them (never keep or what it is built from) until they fit in the budget
+    total = sum(size for value, size in loaded.values())
+    by_size = sorted(loaded, key = lambda name: -loaded[name][1]) #a stable sort keeps the least recently used first for ties
+    for name in by_size:
+        if total <= BUDGET:
+            break
+        if name not in loaded or keep in group(name):
+            continue
+        for dropped in group(name):
+            total -= loaded.pop(dropped)[1]
+
+def get(name):
+    #return a dataset, loading it if it is not in memory, or waiting for it if another thread is loading it
+    with lock:
+        if name in loaded:
+            loaded.move_to_end(name)
+            return loaded[name][0]
+        future = loading.get(name)
+        if future is not None:
+            waiting = True
+        else:
+            waiting = False
+            future = loading[name] = Future()
+    if waiting:
+        say('\nWaiting for the %s data, which is being loaded in the background...' % name)
+        try:
+            return future.result()
+        except Exception: #the other load failed, try once more here so the error is shown to this caller
+            return get(name)
+
+    try:
+        with prof.stage('load %s' % name):
+            value = LOADERS[name]()
+        size = data_size(value)
+    except BaseException as error:
+        with lock:
+            del loading[name]
+        future.set_exception(error)
+        raise
+    with lock:
+        loaded[name] = (value, size)
+        evict(name)
+        del loading[name]
+    future.set_result(value)
+    return value
+
+def clear():
+    with lock:
+        loaded.clear()
+
+def say(*args, **kwargs):
+    #print a loading message, unless it is printed by a warm-up thread
+    if not getattr(local, 'quiet', False):
+        print(*args, **kwargs)
+
+def warm_group(names):
+    local.quiet = True
+    for name in names:
+        try:
+            get(name)
+        except Exception: #e.g. a missing data file; the option will show the error when it loads the dataset itself
+            return
+
+def warm_up(groups = WARM_UP):
+    #start loading the datasets in the background and return the threads
+    threads = []
+    for i, names in enumerate(groups):
+        thread = threading.Thread(target = warm_group, args = (names,), name = '%s-%d' % (WARM_UP_THREAD, i), daemon = True)
+        thread.start()
+        threads.append(thread)
+    return threads
@@ -0,0 +1,119 @@
+'''
+Description: This is the helper program that joins the employers that hired Heinz \
+students (Option 1) with the employers that filed visa applications in the LCA \
+data (Option 2).
+
+Employer names are written differently in the two sources ('Google LLC' vs \
+'Google', 'J.P. Morgan Chase & Co.' vs 'JPMorgan Chase'), so every name is \
+turned into a key first:
+    - lower-case, '&' becomes 'and', and the '*' Heinz uses to flag international \
+hires and all punctuation are removed
+    - a leading 'the' and trailing company suffixes (LLC, Inc, Corp, Ltd, ...) \
+are dropped
+
+The visa case counts of all LCA names with the same key are added up once into a \
+dictionary, saved as 'visa_cache/sponsors.pkl' next to the visa data cache. A \
+Heinz employer is then looked up by its key, or by its key without spaces if \
+that finds nothing ('jp morgan' vs 'jpmorgan'), instead of being compared to \
+every LCA name.
+
+'''
+
+import os
+import re
+import pickle
+import tempfile
+import pandas as pd
+import visaData as vd
+
+#words dropped from the end of employer names ('and' is left over from '& Co.')
+SUFFIXES = {'llc', 'l l c', 'inc', 'incorporated', 'corp', 'corporation', 'co', 'company', 'ltd', 'limited',
+            'lp', 'llp', 'plc', 'pllc', 'pc', 'na', 'n a', 'and'}
+
+SPONSOR_FILE = 'sponsors.pkl'
+
+def normalize_employer(name):
+    #the key used to match an employer name between the Heinz and visa data
+    words = re.sub(r'[^a-z0-9 ]', ' ', str(name).lower().replace('&', ' and ')).split()
+    if words and words[0] == 'the':
+        words = words[1:]
+    changed = True
+    while changed and len(words) > 1: #keep at least one word ('Company' alone stays 'company')
+        changed = False
+        for n in (3, 2, 1): #suffixes written with spaces, like 'l l c' from 'L.L.C.'
+            if len(words) > n and ' '.join(words[-n:]) in SUFFIXES:
+                words = words[:-n]
+                changed = True
+                break
+    return ' '.join(words)
+
+def build_sponsor_table(employer_counts):
+    '''
+    Add up the visa case counts of every LCA employer name with the same key.
+    employer_counts is a dataframe with columns 'employer', 'total' and 'certified'.
+    Returns {'keys': {key: {'total', 'certified': int, 'names': [LCA names]}}, 'compact': {key without spaces: key}}
+    '''
+    keys = {}
+    for name, total, certified in zip(employer_counts['employer'], employer_counts['total'], employer_counts['certified']):
+        key = normalize_employer(name)
+        if not key:
+            continue
+        entry = keys.setdefault(key, {'total': 0, 'certified': 0, 'names': []})
+        entry['total'] += int(total)
+        entry['certified'] += int(certified)
+        entry['names'].append(name)
+    compact = {}
+    for key in keys:
+        compact.setdefault(key.replace(' ', ''), key)
+    return {'keys': keys, 'compact': compact}
+
+def lookup(table, name):
+    #the sponsor entry of an employer name, or None if no LCA employer has the same key
+    key = normalize_employer(name)
+    entry = table['keys'].get(key)
+    if entry is None:
+        entry = table['keys'].get(table['compact'].get(key.replace(' ', '')))
+    return entry
+
+def join_employers(employers, table):
+    #visa case counts for a list of Heinz employers
+    rows = []
+    for name in employers:
+        entry = lookup(table, name)
+        rows.append([name, entry['total'] if entry else 0, entry['certified'] if entry else 0])
+    return pd.DataFrame(rows, columns = ['Employer', 'Visa Cases', 'Certified'])
+
+def load_sponsor_table(folder = '.', build = True):
+    '''
+    Load the sponsor table, rebuilding it when the visa data changed.
+    With build=False, the visa data is never parsed: the last saved table is returned (None if there is none).
+    '''
+    if vd.feather is None: #no cache without pyarrow
+        if not build:
+            return None
+        with tempfile.TemporaryDirectory() as temp:
+            return build_sponsor_table(vd.load_employers(temp, vd.parse_without_cache(folder, temp)))
+
+    path = os.path.join(folder, vd.CACHE_FOLDER, SPONSOR_FILE)
+    try:
+        with open(path, 'rb') as file:
+            saved = pickle.load(file)
+    except (FileNotFoundError, EOFError, pickle.UnpicklingError):
+        saved = None
+    if not build:
+        return saved['table'] if saved else None
+
+    with vd.cache_lock: #one thread at a time updates the cache and saves the table
+        return refresh_sponsor_table(folder, saved, path)
+
+def refresh_sponsor_table(folder, saved, path):
+    manifest = vd.update_cache(folder)
+    if saved is not None and saved['sources'] == manifest:
+        return saved['table']
+
+    #the employer totals of every quarter were saved when it was parsed, no need to read the rows again
+    table = build_sponsor_table(vd.load_employers(folder, list(manifest)))
+    with open(path + '.tmp', 'wb') as file:
+        pickle.dump({'sources': manifest, 'table': table}, file, protocol = pickle.HIGHEST_PROTOCOL)
+    os.replace(path + '.tmp', path)
+    return table
@@ -2,14 +2,43 @@
 Description: This is the main program to interact with \
 the 'Heinz Career Outcome Application.'
 
+The utilities are only imported when their menu option is first chosen, so the \
+menu shows up without waiting for tabula, pandas, BeautifulSoup, etc. to load \
+(see benchmarks/benchStartup.py).
+
+Run 'python main.py --warm-up' (or set the environment variable CAREER_WARM_UP=1) \
+to load the data of all options in the background while the menu waits for a \
+choice (see dataStore.py).
+
+Run 'python main.py --profile' (or '--profile trace.json') to print how long \
+each step of an option took, and how much memory and how many rows it used \
+(see profiling.py).
+
 '''
 
-#import the utilities as menu options
-import HeinzReport as option1
-import careerReport as option2
-import CPI as option3
+import os
+import sys
+import importlib
+import profiling as prof
+
+#the utility run by each menu option
+OPTIONS = {1: 'HeinzReport', 2: 'careerReport', 3: 'CPI'}
+
+def load_option(choice):
+    #import the utility of a menu option (Python keeps it loaded after the first time)
+    return importlib.import_module(OPTIONS[choice])
+
+def main(argv = None):
+    argv = sys.argv[1:] if argv is None else argv
+    if '--profile' in argv: #'--profile' alone prints the summaries, '--profile trace.json' also saves them
+        i = argv.index('--profile')
+        prof.enable(argv[i + 1] if i + 1 < len(argv) and not argv[i + 1].startswith('--') else None)
+    else:
+        prof.enable_from_env()
+    if '--warm-up' in argv or os.environ.get('CAREER_WARM_UP') == '1':
+        import dataStore
+        dataStore.warm_up()
 
-def main():
     #coding the menu option
     choice = 0
     while choice != 4:
@@ -33,16 +62,9 @@ def main():
                 choice = 0
                 continue
             else: #run respective .py file for choice
-                if choice == 1:
-                    option1.main()
-                    print('-'*50+ '\n')
-                    continue
-                if choice == 2:
-                    option2.main()
-                    print('-'*50+ '\n')
-                    continue
-                if choice == 3:
-                    option3.main()
+                if choice in OPTIONS:
+                    load_option(choice).main()
+                    prof.report('Option %d' % choice) #only if profiling is on
                     print('-'*50+ '\n')
                     continue
 
@@ -0,0 +1,173 @@
+'''
+Description: This is the helper program that measures where the time goes in \
+the three menu options.
+
+The slow steps of HeinzReport, careerReport, CPI and the modules they use are \
+wrapped in named stages:
+
+    with profiling.stage('visa: parse quarters') as record:
+        ...
+        record['rows'] = len(visa_data)
+
+When profiling is on, each stage records its wall time, the peak memory (RSS) of \
+the program while the stage ran, and the number of rows it handled. The peak is \
+measured by a background thread that reads the program's memory every 10 ms \
+while stages are open (where /proc is not available, e.g. on macOS, the highest \
+memory the program ever used is recorded instead). Stages whose work runs in \
+other processes (e.g. the LCA parsing pool) are marked with workers=True and \
+also record the peak memory of the largest worker process that has finished. \
+After each menu option, main.py prints a summary of the stages and, if a trace \
+file was given, adds the stages to it as JSON.
+
+Profiling is off unless main.py is run with '--profile' (or '--profile trace.json'), \
+or the environment variable CAREER_PROFILE is set (to 1, or to the trace file). \
+When it is off, a stage does nothing.
+
+'''
+
+import os
+import sys
+import json
+import time
+import threading
+from contextlib import contextmanager
+
+try:
+    import resource
+except ImportError: #not available on Windows; the peak memory is not recorded there
+    resource = None
+
+#{'enabled': bool, 'trace': path of the JSON trace or None}
+settings = {'enabled': False, 'trace': None}
+
+#the stages recorded since the last summary
+records = []
+lock = threading.Lock()
+
+#the stages running now, whose peak memory is raised by the sampler thread
+active = []
+sampler = {'thread': None}
+SAMPLE_INTERVAL = 0.01
+
+try:
+    PAGE_SIZE = os.sysconf('SC_PAGE_SIZE')
+except (AttributeError, ValueError, OSError): #not available on Windows
+    PAGE_SIZE = 4096
+
+def enable(trace = None):
+    settings['enabled'] = True
+    settings['trace'] = trace
+
+def enable_from_env():
+    #turn profiling on if CAREER_PROFILE is set: '1' to print summaries, anything else is also the trace file
+    value = os.environ.get('CAREER_PROFILE')
+    if value:
+        enable(None if value == '1' else value)
+
+def peak_rss(who = 'self'):
+    #the most memory the program (or, with who='children', its largest finished worker process) used so far, in MB
+    #(None if it cannot be measured)
+    if resource is None:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_CHILDREN if who == 'children' else resource.RUSAGE_SELF).ru_maxrss
+    return peak / 1024 / 1024 if sys.platform == 'darwin' else peak / 1024 #bytes on macOS, KB on Linux
+
+def current_rss():
+    #the memory the program uses now, in MB (None where /proc is not available)
+    try:
+        with open('/proc/self/statm', 'r') as file:
+            return int(file.read().split()[1]) * PAGE_SIZE / 1024 / 1024
+    except (OSError, ValueError, IndexError):
+        return None
+
+def sample():
+    #runs on its own thread while stages are open: raises the peak of every open stage to the memory used now
+    while True:
+        rss = current_rss()
+        with lock:
+            if not active or rss is None:
+                sampler['thread'] = None
+                return
+            for record in active:
+                record['peak_rss_mb'] = max(record['peak_rss_mb'], rss)
+        time.sleep(SAMPLE_INTERVAL)
+
+@contextmanager
+def stage(name, rows = None, workers = False):
+    '''
+    Record the time, peak memory and rows of the code in the with block (rows can be set later in the record).
+    With workers=True, the peak memory of the largest finished worker process is recorded too.
+    '''
+    if not settings['enabled']:
+        yield {}
+        return
+    record = {'stage': name, 'rows': rows, 'thread': threading.current_thread().name, 'peak_rss_mb': current_rss()}
+    if record['peak_rss_mb'] is not None:
+        with lock:
+            active.append(record)
+            if sampler['thread'] is None:
+                sampler['thread'] = threading.Thread(target = sample, name = 'profiling-sampler', daemon = True)
+                sampler['thread'].start()
+    start = time.perf_counter()
+    try:
+        yield record
+    finally:
+        record['seconds'] = time.perf_counter() - start
+        rss = current_rss()
+        with lock:
+            active[:] = [r for r in active if r is not record]
+        if rss is None or record['peak_rss_mb'] is None:
+            record['peak_rss_mb'] = peak_rss()
+        else:
+            record['peak_rss_mb'] = max(record['peak_rss_mb'], rss)
+        if workers:
+            record['workers_peak_rss_mb'] = peak_rss('children')
+        with lock:
+            records.append(record)
+
+def summary(records):
+    #one row per stage name: how many times it ran, total seconds, rows, and the highest peak memory
+    rows = {}
+    for record in records:
+        row = rows.setdefault(record['stage'], {'stage': record['stage'], 'calls': 0, 'seconds': 0.0, 'rows': None,
+                                                'peak_rss_mb': None, 'workers_peak_rss_mb': None})
+        row['calls'] += 1
+        row['seconds'] += record['seconds']
+        if record['rows'] is not None:
+            row['rows'] = (row['rows'] or 0) + record['rows']
+        for key in ('peak_rss_mb', 'workers_peak_rss_mb'):
+            if record.get(key) is not None:
+                row[key] = max(row[key] or 0, record[key])
+    return list(rows.values())
+
+def print_summary(rows):
+    print('\nPROFILE')
+    print('%-42s %6s %10s %12s %14s %14s' % ('Stage', 'Calls', 'Seconds', 'Rows', 'Peak RSS (MB)', 'Workers (MB)'))
+    for row in rows:
+        print('%-42s %6d %10.3f %12s %14s %14s' % (row['stage'], row['calls'], row['seconds'], '' if row['rows'] is None else row['rows'],
+              '' if row['peak_rss_mb'] is None else '%.1f' % row['peak_rss_mb'],
+              '' if row['workers_peak_rss_mb'] is None else '%.1f' % row['workers_peak_rss_mb']))
+
+def write_trace(path, label, records):
+    #add the stages of one run to the JSON trace file (a list of runs)
+    try:
+        with open(path, 'r') as file:
+            runs = json.load(file)
+    except (FileNotFoundError, json.JSONDecodeError):
+        runs = []
+    runs.append({'run': label, 'time': time.time(), 'stages': records})
+    with open(path, 'w') as file:
+        json.dump(runs, file, indent = 1)
+
+def report(label):
+    #print the summary of the stages recorded since the last report, save them to the trace file, and start over
+    if not settings['enabled']:
+        return
+    with lock:
+        done = list(records)
+        records.clear()
+    if not done:
+        return
+    print_summary(summary(done))
+    if settings['trace']:
+        write_trace(settings['trace'], label, done)
@@ -0,0 +1,194 @@
+'''
+Description: This is the helper program that saves the results of Option 1 and \
+Option 2 for the job titles users ask about, so a title asked again is answered \
+without loading or searching the data.
+
+A result is saved under its kind ('heinz' or 'career'), the job title as the \
+option matches it (e.g. upper-cased words for Option 2), and the version of the \
+data it was computed from: the size and modified time of the data files it \
+depends on (e.g. 'Heinz_Employment.csv', the LCA files and the visa cache \
+manifest). When one of these files is added, changed or rebuilt, the version \
+changes and the saved results of the older version are not used anymore.
+
+The results are kept in two places:
+    - in memory, up to RESULT_CACHE_MB megabytes (16 by default)
+    - on disk in the 'result_cache' folder, one '<key>.pkl' file per result, up \
+to RESULT_CACHE_DISK_MB megabytes (64 by default), so they are kept between runs
+In both, the results that were not used for the longest time are dropped first \
+when the limit is reached. Results are also computed again after \
+RESULT_CACHE_TTL_DAYS days (1 by default), so the data is still checked for \
+updates (e.g. a new BLS page) when the same titles keep being asked.
+
+'''
+
+import os
+import time
+import pickle
+import hashlib
+import threading
+from collections import OrderedDict
+import dataStore as ds
+
+CACHE_FOLDER = 'result_cache'
+MEMORY_BUDGET = float(os.environ.get('RESULT_CACHE_MB', 16)) * 1024 * 1024
+DISK_BUDGET = float(os.environ.get('RESULT_CACHE_DISK_MB', 64)) * 1024 * 1024
+RESULT_TTL = float(os.environ.get('RESULT_CACHE_TTL_DAYS', 1)) * 24 * 3600
+
+#the results in memory, from the least to the most recently used: {(kind, title): (version, saved time, result, size in bytes)}
+memory = OrderedDict()
+lock = threading.Lock()
+
+#the size in bytes of the result files, counted once per folder and then kept up to date as files are written and deleted
+disk_total = {}
+
+def file_version(paths):
+    #size and modified time of every file (None if it is missing); a file that is written again gets a new version
+    version = []
+    for path in paths:
+        try:
+            stat = os.stat(path)
+            version.append([os.path.basename(path), stat.st_size, stat.st_mtime_ns])
+        except FileNotFoundError:
+            version.append([os.path.basename(path), None])
+    return version
+
+def cache_file(kind, title, folder = '.'):
+    key = hashlib.sha1(('%s\n%s' % (kind, title)).encode('utf-8')).hexdigest()
+    return os.path.join(folder, CACHE_FOLDER, key + '.pkl')
+
+def remember(key, version, saved, result, size):
+    #keep a result in memory, dropping the least recently used ones past the budget (never the new one)
+    with lock:
+        memory[key] = (version, saved, result, size)
+        memory.move_to_end(key)
+        total = sum(entry[3] for entry in memory.values())
+        for old in list(memory):
+            if total <= MEMORY_BUDGET:
+                break
+            if old != key:
+                total -= memory.pop(old)[3]
+
+def file_size(path):
+    try:
+        return os.path.getsize(path)
+    except FileNotFoundError:
+        return 0
+
+def remove_entry(path):
+    size = file_size(path)
+    try:
+        os.remove(path)
+    except FileNotFoundError:
+        return
+    folder = os.path.dirname(path)
+    with lock:
+        if folder in disk_total:
+            disk_total[folder] -= size
+
+def read_entry(path):
+    #a file that cannot be read back (e.g. saved by another version of pandas or numpy) is deleted and computed again
+    try:
+        with open(path, 'rb') as file:
+            return pickle.load(file)
+    except FileNotFoundError:
+        return None
+    except Exception:
+        remove_entry(path)
+        return None
+
+def write_entry(path, entry):
+    #the temporary file is named after the thread, so two threads never write the same one
+    folder = os.path.dirname(path)
+    os.makedirs(folder, exist_ok = True)
+    temp = '%s.%d.tmp' % (path, threading.get_ident())
+    with open(temp, 'wb') as file:
+        pickle.dump(entry, file, protocol = pickle.HIGHEST_PROTOCOL)
+    old_size = file_size(path)
+    os.replace(temp, path)
+    with lock:
+        if folder not in disk_total: #the files of earlier runs are counted once
+            disk_total[folder] = folder_size(folder)
+        else:
+            disk_total[folder] += file_size(path) - old_size
+        over = disk_total[folder] > DISK_BUDGET
+    if over: #the folder is only listed when it is over the budget
+        prune(folder)
+
+def result_files(folder):
+    #(modified time, size, name) of every result file in folder
+    files = []
+    for name in os.listdir(folder):
+        if name.endswith('.pkl'):
+            try:
+                stat = os.stat(os.path.join(folder, name))
+            except FileNotFoundError: #deleted by another thread
+                continue
+            files.append((stat.st_mtime, stat.st_size, name))
+    return files
+
+def folder_size(folder):
+    return sum(size for mtime, size, name in result_files(folder))
+
+def prune(folder):
+    #delete the least recently used result files (by modified time, updated when a file is used) until they fit in the disk budget
+    files = result_files(folder)
+    total = sum(size for mtime, size, name in files)
+    for mtime, size, name in sorted(files)[:-1]: #the newest file is always kept
+        if total <= DISK_BUDGET:
+            break
+        try:
+            os.remove(os.path.join(folder, name))
+        except FileNotFoundError:
+            pass
+        total -= size
+    with lock:
+        disk_total[folder] = total
+
+def lookup(kind, title, version, now):
+    #the saved result for the title if it was computed from this version of the data and is not too old, otherwise None
+    key = (kind, title)
+    with lock:
+        entry = memory.get(key)
+        if entry is not None and entry[0] == version and now - entry[1] < RESULT_TTL:
+            memory.move_to_end(key)
+            return entry[2]
+    path = cache_file(kind, title)
+    saved = read_entry(path)
+    if not isinstance(saved, dict) or saved.get('key') != [kind, title]:
+        return None
+    if saved.get('version') != version or now - saved.get('saved', 0) >= RESULT_TTL: #from older data, never used again
+        remove_entry(path)
+        return None
+    try:
+        os.utime(path) #marks the file as recently used
+    except FileNotFoundError: #deleted by another thread since it was read
+        pass
+    remember(key, version, saved['saved'], saved['result'], ds.data_size(saved['result']))
+    return saved['result']
+
+def get(kind, title, paths, compute):
+    '''
+    Return the result of compute() for a title, from memory or disk if it was already computed from the same
+    version of the data files in paths (a function returning the list of paths). The title must already be normalized
+    the way the option matches it, so titles with the same result share one entry.
+    '''
+    now = time.time()
+    result = lookup(kind, title, file_version(paths()), now)
+    if result is not None:
+        return result
+    result = compute()
+    #the version is read again because computing the result may have rebuilt the data files
+    version = file_version(paths())
+    remember((kind, title), version, now, result, ds.data_size(result))
+    write_entry(cache_file(kind, title), {'key': [kind, title], 'version': version, 'saved': now, 'result': result})
+    return result
+
+def clear(folder = '.'):
+    #drop every saved result, in memory and on disk
+    with lock:
+        memory.clear()
+        disk_total.clear()
+    path = os.path.join(folder, CACHE_FOLDER)
+    if os.path.isdir(path):
+        for name in os.listdir(path):
+            os.remove(os.path.join(path, name))
@@ -0,0 +1,49 @@
+'''
+Description: These are the checks that finding the employers of a job title \
+through the title search index (see HeinzReport.py) gives the same rows and the \
+same employer list as filtering every row with str.contains and grouping them by \
+employer, as the program did before.
+
+Run with: python -m pytest tests
+
+'''
+
+import os
+import sys
+import numpy as np
+import pandas as pd
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+sys.path.insert(0, os.path.join(ROOT, 'benchmarks'))
+
+import fixtures
+import HeinzReport
+
+#the same employers under several titles that differ only in case, a missing title, and short titles
+ROWS = [['Acme', 'Data Analyst', 'MISM', 2021], ['Acme', 'data analyst', 'MSPPM', 2022], ['Beta', 'DATA ANALYST II', 'MAM', 2023],
+        ['Acme', 'Senior Data Analyst', 'MISM', 2023], ['Beta', 'QA', 'MISM', 2022], ['Gamma', 'Analyst', 'MSHCA', 2021],
+        ['Gamma', np.nan, 'MISM', 2022], ['Acme', 'A', 'MAM', 2021]]
+
+QUERIES = ['data analyst', 'DATA ANALYST', 'Data', 'analyst', 'alyst', 'a', 'an', 'QA', 'qa', 'ii', ' ', 'x', 'nothing',
+           'Engineer', 'software engineer', 'Senior', 'Senior Data', 'ta an']
+
+def reference_employers(all_df, title):
+    #the search before the index: every row filtered with str.contains, then grouped by employer
+    matches = all_df[all_df['Job Title'].str.contains(title, case = False, na = False)]
+    grouped = matches.groupby('Employer')[['Degree', 'Job Title']].agg(', '.join).reset_index()
+    grouped['Year'] = matches.groupby('Employer')['Year'].apply(lambda x: ', '.join(x.astype(str))).reset_index()['Year']
+    return matches, grouped
+
+def test_find_employers_matches_str_contains():
+    handmade = pd.DataFrame(ROWS, columns = ['Employer', 'Job Title', 'Degree', 'Year'])
+    all_df = pd.concat([handmade, fixtures.make_heinz_data(3000), handmade], ignore_index = True)
+    index = HeinzReport.build_search_index(all_df)
+    for query in QUERIES:
+        matches, result_df = HeinzReport.find_employers(all_df, query, index)
+        expected_matches, expected_df = reference_employers(all_df, query)
+        pd.testing.assert_frame_equal(matches, expected_matches)
+        if expected_matches.empty:
+            assert result_df.empty
+        else:
+            pd.testing.assert_frame_equal(result_df, expected_df)
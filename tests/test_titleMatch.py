@@ -0,0 +1,78 @@
+'''
+Description: These are the checks that the title matching of titleMatch.py gives \
+the same matches as comparing the user's input to every title with textdistance, \
+as the program did before (see the first version of careerReport.py), for the \
+visa titles and for the employment projection rows.
+
+Run with: python -m pytest tests
+
+'''
+
+import os
+import sys
+import numpy as np
+import textdistance as td
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+sys.path.insert(0, os.path.join(ROOT, 'benchmarks'))
+
+import fixtures
+import titleMatch as tm
+
+#titles with repeated words, different case and spaces, no words at all, and scores of exactly 0.4 for 'DATA ANALYST'
+#(2 shared words out of 5) or for 'DATA DATA' (2 out of 5, counting the repeated word twice)
+TITLES = ['Data Analyst', 'data analyst ', 'DATA DATA ANALYST', 'Data Data Data Analyst', 'ANALYST DATA', '', '   ',
+          float('nan'), 'Senior Data Analyst', 'Data Analyst Lead Principal Staff', 'Data Analyst Lead Principal',
+          'DATA DATA X Y Z', 'DATA DATA X Y', 'Data', 'analyst', 'Software Engineer', 'Senior Software Engineer II']
+
+QUERIES = ['data analyst', 'DATA DATA', 'Data', 'analyst data data', 'Software Engineer', '', '   ', 'nothing matches',
+           'Senior Data Analyst', 'data analyst lead']
+
+def reference_titles(titles, query):
+    #the matching loop before the index: every title compared to the query with textdistance
+    return {str(t).upper().strip() for t in titles if td.jaccard(str(t).upper().split(), query.upper().split()) > 0.4}
+
+def test_match_titles_matches_textdistance():
+    rng = np.random.default_rng(0)
+    words = ['DATA', 'ANALYST', 'SENIOR', 'ENGINEER', 'LEAD']
+    #random titles of repeated words, so many of them share words and sizes with the queries
+    titles = TITLES + fixtures.make_titles(300) + [' '.join(rng.choice(words, rng.integers(0, 6))) for i in range(300)]
+    index = tm.build_title_index(titles)
+    for query in QUERIES + [' '.join(rng.choice(words, rng.integers(1, 5))) for i in range(100)]:
+        assert tm.match_titles(index, query) == reference_titles(titles, query), query
+
+#projection rows whose titles tie for the best score (e.g. 'Data Analyst' and 'Analyst Data' for 'data analyst'),
+#with repeated titles, the text the BLS page adds to some titles, and an empty title
+OCCUPATIONS = ['Data Analyst*Analyst Data*Data Scientist', 'Analyst Data*Data Analyst',
+               'Software Engineer*Software Engineer*Engineer Software Show/hide Example Job Titles',
+               'Data Scientist*Scientist Data*Senior Data Scientist', 'Engineer*', 'Lead Data Analyst*Data Lead Analyst',
+               'Data*Analyst*Data Analyst Data', 'Teacher*Professor']
+
+def reference_occupations(occupations, query):
+    #the matching loop before the alias table: the most similar title of every row, with max() on a dictionary
+    matches = []
+    for row, occupation in enumerate(occupations):
+        temp_dict = {}
+        for k in occupation.split('*'):
+            k = k.replace(' Show/hide Example Job Titles','').strip()
+            temp_dict[k] = td.jaccard(k.upper().split(), query.upper().split())
+        m = max(temp_dict, key = temp_dict.get)
+        if temp_dict[m] > 0.4:
+            matches.append((row, m))
+    return matches
+
+def test_match_occupations_matches_textdistance():
+    rng = np.random.default_rng(1)
+    words = ['DATA', 'ANALYST', 'SCIENTIST', 'ENGINEER', 'SOFTWARE', 'LEAD']
+    #random rows of several titles made of the same few words, so ties are common
+    occupations = OCCUPATIONS + ['*'.join(' '.join(rng.choice(words, rng.integers(1, 4))) for j in range(rng.integers(1, 5)))
+                                 for i in range(200)]
+    queries = QUERIES + ['analyst data', 'software engineer', 'data scientist'] + \
+              [' '.join(rng.choice(words, rng.integers(1, 4))) for i in range(50)]
+    matcher = tm.build_alias_matcher(occupations)
+    expected = [reference_occupations(occupations, query) for query in queries]
+    #both titles of the first two rows are the same as 'data analyst', and the first one of the row wins the tie
+    assert expected[0][:2] == [(0, 'Data Analyst'), (1, 'Analyst Data')]
+    assert tm.match_occupations(matcher, queries) == expected
+    assert tm.match_occupations(matcher, queries, batch_size = 7) == expected #more queries than one batch
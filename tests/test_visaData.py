@@ -0,0 +1,70 @@
+'''
+Description: These are the checks that the chunked reading of the LCA files \
+(see visaData.py) gives the same case counts and visa report as grouping all \
+rows at once (added up one partition at a time), on small synthetic data (see benchmarks/fixtures.py), and that \
+updating the report for added quarters gives the same report as building it \
+again.
+
+Run with: python -m pytest tests
+
+'''
+
+import os
+import sys
+import pandas as pd
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+sys.path.insert(0, os.path.join(ROOT, 'benchmarks'))
+
+import fixtures
+import visaData as vd
+
+def write_data(folder):
+    #two quarters of synthetic rows, with some missing titles and employers
+    paths = fixtures.write_lca_quarters(str(folder), 40000, quarters = 2, titles = 300, employers = 2000)
+    data = pd.read_csv(paths[0])
+    data.loc[::997, 'EMPLOYER_NAME'] = None
+    data.loc[::1009, 'JOB_TITLE'] = None
+    data.to_csv(paths[0], index = False)
+    return paths
+
+def reference_pairs(paths):
+    #the pair counts computed by grouping every row at once, as before the data was read in chunks
+    data = pd.concat([pd.read_csv(path, encoding = 'latin', usecols = vd.VISA_COLUMNS) for path in paths], ignore_index = True)
+    pairs = pd.DataFrame({'title': [str(title).upper().strip() for title in data['JOB_TITLE']],
+                          'employer': data['EMPLOYER_NAME'], 'total': 1,
+                          'certified': (data['CASE_STATUS'] == 'Certified').astype(int),
+                          'withdrawn': (data['CASE_STATUS'] == 'Withdrawn').astype(int),
+                          'denied': (data['CASE_STATUS'] == 'Denied').astype(int)})
+    return pairs.groupby(['title', 'employer'], sort = False, dropna = False)[vd.COUNT_COLUMNS].sum().reset_index()
+
+def test_partitions_match_grouping_all_rows(tmp_path):
+    paths = write_data(tmp_path)
+    expected = reference_pairs(paths).sort_values(['title', 'employer']).reset_index(drop = True)
+    os.makedirs(os.path.join(str(tmp_path), vd.CACHE_FOLDER))
+    for chunk_rows in (7000, 100000):
+        for path in paths:
+            vd.parse_quarter(path, str(tmp_path), chunk_rows)
+        names = [os.path.basename(path) for path in paths]
+        pairs = pd.concat([vd.partition_pairs(str(tmp_path), names, partition) for partition in range(vd.PARTITIONS)])
+        pairs = pairs.sort_values(['title', 'employer']).reset_index(drop = True)
+        pd.testing.assert_frame_equal(pairs, expected, check_dtype = False)
+        employers = vd.load_employers(str(tmp_path), names).set_index('employer').sort_index()
+        assert employers['total'].to_dict() == expected.groupby('employer')['total'].sum().to_dict()
+        assert employers['certified'].to_dict() == expected.groupby('employer')['certified'].sum().to_dict()
+
+def test_visa_report_matches_grouping_all_rows(tmp_path, monkeypatch):
+    paths = write_data(tmp_path)
+    monkeypatch.setattr(vd, 'CHUNK_ROWS', 7000)
+    report, index = vd.load_visa_report(str(tmp_path))
+    assert report == vd.build_title_report(reference_pairs(paths))
+
+def test_added_quarters_give_the_same_report(tmp_path):
+    #the first quarter is added after the report of the later ones was saved
+    paths = fixtures.write_lca_quarters(str(tmp_path), 30000, quarters = 3, titles = 50, employers = 400)
+    os.rename(paths[0], paths[0] + '.new')
+    vd.load_visa_report(str(tmp_path))
+    os.rename(paths[0] + '.new', paths[0])
+    report, index = vd.load_visa_report(str(tmp_path))
+    assert report == vd.build_report(str(tmp_path), [os.path.basename(path) for path in paths])[0]
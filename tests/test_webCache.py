@@ -0,0 +1,69 @@
+'''
+Description: These are the checks that webCache.fetch downloads a page once, \
+uses the saved copy within the ttl, asks the server again with the saved ETag \
+after it, and uses the saved copy when the server cannot be reached, against a \
+small local web server.
+
+Run with: python -m pytest tests
+
+'''
+
+import os
+import sys
+import threading
+import pytest
+import requests
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+import webCache as wc
+
+def start_server(pages, requests_seen):
+    #serve pages ({path: (body, etag)}), answering 304 when the client already has the same ETag
+    class Handler(BaseHTTPRequestHandler):
+        def do_GET(self):
+            body, etag = pages[self.path]
+            requests_seen.append(self.headers.get('If-None-Match'))
+            if self.headers.get('If-None-Match') == etag:
+                self.send_response(304)
+                self.end_headers()
+                return
+            self.send_response(200)
+            self.send_header('ETag', etag)
+            self.send_header('Content-Length', str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def log_message(self, *args): #keep the test output quiet
+            pass
+
+    server = ThreadingHTTPServer(('127.0.0.1', 0), Handler)
+    threading.Thread(target = server.serve_forever, daemon = True).start()
+    return server, 'http://127.0.0.1:%d' % server.server_address[1]
+
+def test_fetch_statuses(tmp_path):
+    folder = str(tmp_path)
+    pages = {'/page': (b'first version', '"1"')}
+    seen = []
+    server, url = start_server(pages, seen)
+    url += '/page'
+
+    assert wc.fetch(url, ttl = 3600, folder = folder) == (b'first version', 'downloaded')
+    assert wc.fetch(url, ttl = 3600, folder = folder) == (b'first version', 'cached')
+    assert seen == [None] #the second fetch did not contact the server
+
+    assert wc.fetch(url, ttl = 0, folder = folder) == (b'first version', 'not modified')
+    assert seen[-1] == '"1"'
+
+    pages['/page'] = (b'second version', '"2"')
+    assert wc.fetch(url, ttl = 0, folder = folder) == (b'second version', 'downloaded')
+    with open(wc.body_path(url, folder), 'rb') as file:
+        assert file.read() == b'second version'
+
+    server.shutdown()
+    server.server_close()
+    assert wc.fetch(url, ttl = 0, folder = folder, timeout = 5) == (b'second version', 'cached')
+    with pytest.raises(requests.RequestException): #offline and never downloaded
+        wc.fetch(url + '?other', ttl = 0, folder = folder, timeout = 5)
@@ -0,0 +1,236 @@
+'''
+Description: This is the helper program that matches a user's job title to the \
+job titles in the visa sponsorship and employment projection data.
+
+The similarity used is the same as textdistance's jaccard on the upper-cased \
+words of both titles (repeated words are counted, like textdistance does). \
+Instead of comparing the user's input to every row of the visa data, we build \
+an index once over the unique titles:
+    1- Each word points to the titles that contain it, so only titles sharing \
+a word with the input are scored.
+    2- Titles are grouped by their number of words. A title with a words can \
+never be more than min(a, b)/max(a, b) similar to an input with b words, so \
+those groups are skipped when that bound is not above the threshold.
+
+The titles of the employment projection data are matched the same way, but \
+scored with numpy so many inputs can be matched in one call (see below).
+
+'''
+
+import os
+import pickle
+from collections import Counter
+import numpy as np
+
+#titles need to be more than 40% similar to the user's input to be a match
+THRESHOLD = 0.4
+
+def tokenize(title):
+    #upper-case and split a title into words, same as the original matching code
+    return str(title).upper().split()
+
+def jaccard(words_a, words_b):
+    #same result as td.jaccard(words_a, words_b) for two lists of words
+    if words_a == words_b:
+        return 1
+    if not words_a or not words_b:
+        return 0
+    count_a = Counter(words_a)
+    count_b = Counter(words_b)
+    intersection = sum((count_a & count_b).values())
+    union = sum((count_a | count_b).values())
+    return intersection / union
+
+def build_title_index(titles):
+    '''
+    Build the index over an iterable of raw job titles (e.g. visa_data['JOB_TITLE'].unique()).
+    Returns a dictionary with:
+        'titles': list of unique upper-cased, stripped titles
+        'known': set of those titles
+        'sizes': number of words of each title
+        'postings': {word: {number of words: [(title id, count of the word in the title)]}}
+        'empty': ids of titles that have no words at all
+    '''
+    index = {'titles': [], 'known': set(), 'sizes': [], 'postings': {}, 'empty': []}
+    add_titles(index, titles)
+    return index
+
+def add_titles(index, titles):
+    #add new titles to an existing index in place (titles already in it are skipped)
+    for raw in titles:
+        key = str(raw).upper().strip()
+        if key in index['known']: #many rows share the same title, only index it once
+            continue
+        index['known'].add(key)
+        title_id = len(index['titles'])
+        words = key.split()
+        index['titles'].append(key)
+        index['sizes'].append(len(words))
+        if not words:
+            index['empty'].append(title_id)
+            continue
+        for word, count in Counter(words).items():
+            index['postings'].setdefault(word, {}).setdefault(len(words), []).append((title_id, count))
+
+def match_titles(index, query, threshold = THRESHOLD):
+    #return the set of indexed titles that are more than threshold similar to the query
+    query_words = tokenize(query)
+    if not query_words: #an empty input only matches titles that are empty too
+        return {index['titles'][i] for i in index['empty']} if threshold < 1 else set()
+
+    query_size = len(query_words)
+    intersections = {}
+    for word, query_count in Counter(query_words).items():
+        by_size = index['postings'].get(word)
+        if by_size is None:
+            continue
+        for size, entries in by_size.items():
+            #skip the whole group if the best possible similarity is not above the threshold
+            if min(size, query_size) / max(size, query_size) <= threshold:
+                continue
+            for title_id, count in entries:
+                intersections[title_id] = intersections.get(title_id, 0) + min(count, query_count)
+
+    matched = set()
+    sizes = index['sizes']
+    for title_id, intersection in intersections.items():
+        union = sizes[title_id] + query_size - intersection
+        if intersection / union > threshold:
+            matched.add(index['titles'][title_id])
+    return matched
+
+#Matching the employment projection data
+#
+#Each 'Occupation Title' in the BLS data holds several titles separated by '*'. A row
+#matches the user's input if its most similar title is more than 40% similar. The titles
+#of every row are split once into an alias table and the words of all aliases are stored
+#as a sparse word-by-alias table (numpy arrays), so a whole batch of inputs is scored
+#with a few array operations instead of a Python loop per row and input.
+
+def split_occupation_title(title):
+    #split one 'Occupation Title' into its titles, dropping repeats but keeping the original order
+    aliases = []
+    for k in str(title).split('*'):
+        k = k.replace(' Show/hide Example Job Titles','').strip() #some str will have this unnessary part
+        if k not in aliases:
+            aliases.append(k)
+    return aliases
+
+def build_alias_matcher(occupation_titles):
+    '''
+    Build the alias table for a list of 'Occupation Title' rows. Returns a dictionary with:
+        'aliases', 'alias_row', 'alias_size': every alias, its row number, and its number of words
+        'row_start': position of each row's first alias (aliases of a row are next to each other)
+        'words': {word: word id}
+        'word_ptr', 'post_alias', 'post_count': for word id w, the aliases containing it are
+            post_alias[word_ptr[w]:word_ptr[w+1]], with the word's count in post_count
+    '''
+    aliases = []
+    alias_row = []
+    row_start = []
+    words = {}
+    postings = []
+    for row, title in enumerate(occupation_titles):
+        row_start.append(len(aliases))
+        for alias in split_occupation_title(title):
+            alias_id = len(aliases)
+            aliases.append(alias)
+            alias_row.append(row)
+            for word, count in Counter(tokenize(alias)).items():
+                postings.append((words.setdefault(word, len(words)), alias_id, count))
+
+    postings.sort()
+    post_word = np.array([p[0] for p in postings], dtype = np.int64)
+    return {'aliases': aliases,
+            'alias_row': np.array(alias_row, dtype = np.int64),
+            'alias_size': np.array([len(tokenize(a)) for a in aliases], dtype = np.float64),
+            'row_start': np.array(row_start, dtype = np.int64),
+            'words': words,
+            'word_ptr': np.searchsorted(post_word, np.arange(len(words) + 1)),
+            'post_alias': np.array([p[1] for p in postings], dtype = np.int64),
+            'post_count': np.array([p[2] for p in postings], dtype = np.float64)}
+
+def score_aliases(matcher, queries):
+    #jaccard similarity of every query (rows) to every alias (columns), same as td.jaccard on the words
+    n_alias = len(matcher['aliases'])
+    query_size = np.zeros(len(queries))
+    q_ids, word_ids, q_counts = [], [], []
+    for q, query in enumerate(queries):
+        query_words = tokenize(query)
+        query_size[q] = len(query_words)
+        for word, count in Counter(query_words).items():
+            if word in matcher['words']:
+                q_ids.append(q)
+                word_ids.append(matcher['words'][word])
+                q_counts.append(count)
+
+    #gather the posting lists of every (query, word) pair at once
+    word_ids = np.array(word_ids, dtype = np.int64)
+    starts = matcher['word_ptr'][word_ids]
+    lengths = matcher['word_ptr'][word_ids + 1] - starts
+    total = int(lengths.sum())
+    offsets = np.repeat(starts - np.concatenate(([0], np.cumsum(lengths)[:-1])), lengths)
+    positions = offsets + np.arange(total)
+    q_rep = np.repeat(np.array(q_ids, dtype = np.int64), lengths)
+    count_rep = np.repeat(np.array(q_counts, dtype = np.float64), lengths)
+
+    #a word shared by a query and an alias adds the smaller of its two counts to their intersection
+    shared = np.minimum(matcher['post_count'][positions], count_rep)
+    keys = q_rep * n_alias + matcher['post_alias'][positions]
+    intersection = np.bincount(keys, weights = shared, minlength = len(queries) * n_alias).reshape(len(queries), n_alias)
+    union = query_size[:, None] + matcher['alias_size'][None, :] - intersection
+    with np.errstate(invalid = 'ignore', divide = 'ignore'):
+        scores = intersection / union
+    scores[union == 0] = 1 #both are empty, which textdistance counts as identical
+    return scores
+
+def match_occupations(matcher, queries, threshold = THRESHOLD, batch_size = 256):
+    '''
+    Match a batch of user titles to the projection rows. Returns one list per query of
+    (row number, best matching alias) for every row whose best alias is more than threshold similar.
+    '''
+    queries = list(queries)
+    if not matcher['aliases']:
+        return [[] for _ in queries]
+    results = []
+    for i in range(0, len(queries), batch_size): #bounded batches keep the score table small
+        results.extend(match_batch(matcher, queries[i:i + batch_size], threshold))
+    return results
+
+def match_batch(matcher, queries, threshold):
+    scores = score_aliases(matcher, queries)
+    row_start = matcher['row_start']
+
+    #best score of each row, then the first alias of the row that has it (like max() on the original dict)
+    row_best = np.maximum.reduceat(scores, row_start, axis = 1)
+    is_best = scores == row_best[:, matcher['alias_row']]
+    alias_ids = np.where(is_best, np.arange(scores.shape[1]), scores.shape[1])
+    best_alias = np.minimum.reduceat(alias_ids, row_start, axis = 1)
+
+    results = []
+    for q in range(len(queries)):
+        rows = np.nonzero(row_best[q] > threshold)[0]
+        results.append([(int(r), matcher['aliases'][best_alias[q, r]]) for r in rows])
+    return results
+
+def load_alias_matcher(proj_data, path = 'employmentprojection_aliases.pkl', source = 'employmentprojection.csv'):
+    #load the saved alias matcher, rebuilding it if the projection .csv file changed since it was saved
+    try:
+        stat = os.stat(source)
+        signature = [stat.st_size, stat.st_mtime_ns]
+    except FileNotFoundError:
+        signature = None
+    try:
+        with open(path, 'rb') as file:
+            saved = pickle.load(file)
+    except (FileNotFoundError, EOFError, pickle.UnpicklingError):
+        saved = None
+    if signature is not None and saved is not None and saved['source'] == signature:
+        return saved['matcher']
+
+    matcher = build_alias_matcher(proj_data['Occupation Title'].tolist())
+    if signature is not None:
+        with open(path + '.tmp', 'wb') as file:
+            pickle.dump({'source': signature, 'matcher': matcher}, file, protocol = pickle.HIGHEST_PROTOCOL)
+        os.replace(path + '.tmp', path)
+    return matcher
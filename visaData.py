@@ -0,0 +1,513 @@
+'''
+Description: This is the helper program that loads the visa sponsorship (LCA) data \
+used in careerReport.py.
+
+Reading the LCA .csv files is the slowest part of Option 2, so each quarterly \
+'LCA_Disclosure_Data_FY*_Q*.csv' file is only parsed once, and what the reports \
+need from it is saved in the 'visa_cache' folder as binary columnar files \
+(Arrow format, uncompressed). Later runs memory-map these files instead of \
+parsing the text again.
+
+The size and modified time of every parsed file are saved in \
+'visa_cache/manifest.json'. On each run, only the files that are new or changed \
+since they were parsed are parsed again (e.g. adding FY2023 data only costs \
+parsing the new quarters), and the cache of removed files is deleted. New files \
+are first checked for the columns we need, then parsed in parallel worker \
+processes.
+
+The visa status report only needs a few numbers per job title, so these are \
+computed when a file is parsed: the total, certified, withdrawn and denied case \
+counts for every (upper-cased title, employer) pair. There are about as many \
+pairs as rows, so they are split by job title into PARTITIONS files \
+('<file name>.pairs<n>.feather', 32 by default, set with the environment \
+variable LCA_PARTITIONS), and the total and certified cases of every employer \
+are saved as '<file name>.employers.feather' for the sponsor table (see \
+employerMatch.py).
+
+From these, 'visa_cache/title_report.pkl' keeps, for every title, its case \
+counts and top 10 sponsoring employers, plus the title index used for matching \
+(see titleMatch.py). The quarters are added up one partition at a time: every \
+title is in one partition, so only the pairs of one partition are in memory with \
+the report. When quarters are only added, the report and index are updated in \
+place for the titles of the new quarters, from the partitions that have them, \
+so the report file only holds what is shown and a warm load does not read any \
+pair counts. Showing a report is then a dictionary lookup.
+
+The same few job titles, employers, statuses, cities, etc. repeat over millions \
+of rows, so every column is kept dictionary-encoded: an array of integer codes \
+into a table of the column's distinct strings (a pandas Categorical). Each \
+string is then stored once instead of once per row, and the case counts are computed on the codes with NumPy \
+(np.bincount) instead of grouping strings.
+
+A quarter file can be larger than the memory of the computer (and several years \
+of them much larger), so a file is never read at once: it is read in chunks of \
+CHUNK_ROWS rows (200000 by default, set with the environment variable \
+LCA_CHUNK_ROWS). The pair counts of the chunks are added up, and saved to the \
+partition files whenever there are as many pairs as rows in a chunk; every chunk \
+is dropped before the next one is read. The memory used to parse the data then \
+depends on the chunk size, not on the number of rows. Without pyarrow, the files \
+are parsed the same way into a temporary folder (as pickled tables) on every \
+run, and the report and the sponsor table are built from it.
+
+If none of the quarterly files are in the folder, 'visa_data.csv' (a previously \
+combined copy of the quarterly files) is used as the source instead.
+
+'''
+
+import os
+import glob
+import zlib
+import itertools
+import threading
+import multiprocessing
+import json
+import pickle
+import tempfile
+from concurrent.futures import ProcessPoolExecutor
+import numpy as np
+import pandas as pd
+import titleMatch as tm
+import profiling as prof
+import dataStore as ds
+
+try: #pyarrow is needed for the cache; without it, the program reads the .csv files every time
+    import pyarrow as pa
+    import pyarrow.feather as feather
+except ImportError:
+    pa = None
+    feather = None
+
+#the only columns of the LCA data used in the reports
+VISA_COLUMNS = ['CASE_STATUS','VISA_CLASS','JOB_TITLE','EMPLOYER_NAME','FULL_TIME_POSITION','EMPLOYER_CITY','EMPLOYER_STATE']
+
+#case counts kept for every (title, employer) pair
+COUNT_COLUMNS = ['total','certified','withdrawn','denied']
+
+#changed when the cache files are saved differently, so caches saved before are parsed again
+CACHE_FORMAT = 5
+
+#number of rows of a source file read at once
+CHUNK_ROWS = int(os.environ.get('LCA_CHUNK_ROWS', 200000))
+
+#number of files the pair counts of a source file are split into, by job title
+PARTITIONS = int(os.environ.get('LCA_PARTITIONS', 32))
+
+LCA_PATTERN = 'LCA_Disclosure_Data_FY*_Q*.csv'
+LEGACY_FILE = 'visa_data.csv'
+CACHE_FOLDER = 'visa_cache'
+MANIFEST_FILE = 'manifest.json'
+REPORT_FILE = 'title_report.pkl'
+
+#only one thread at a time updates the cache and the report (e.g. the warm-up and an option, see dataStore.py)
+cache_lock = threading.RLock()
+
+#number of employers listed in each title's visa report
+TOP_EMPLOYERS = 10
+
+def source_files(folder = '.'):
+    #find the quarterly LCA files, or the combined legacy file if there are none
+    files = sorted(glob.glob(os.path.join(folder, LCA_PATTERN)))
+    if not files and os.path.exists(os.path.join(folder, LEGACY_FILE)):
+        files = [os.path.join(folder, LEGACY_FILE)]
+    return files
+
+def version_files(folder = '.'):
+    #the files that change when the visa data changes: the source files, and the manifest that is rewritten when the cache is rebuilt
+    return source_files(folder) + [os.path.join(folder, CACHE_FOLDER, MANIFEST_FILE)]
+
+def file_signature(path):
+    #size and modified time of a source file, used to tell if its cache is outdated
+    stat = os.stat(path)
+    return [stat.st_size, stat.st_mtime_ns]
+
+def cache_path(folder, name, kind = 'feather'):
+    return os.path.join(folder, CACHE_FOLDER, '%s.%s' % (name, kind))
+
+def read_lca_chunks(path, chunk_rows = None):
+    #parse one LCA .csv file chunk_rows rows at a time, keeping only the columns we use, dictionary-encoded as they
+    #are parsed; every chunk is encoded on its own
+    reader = pd.read_csv(path, encoding='latin', index_col = False, usecols = VISA_COLUMNS, dtype = 'category',
+                         chunksize = chunk_rows or CHUNK_ROWS)
+    with reader:
+        yield from reader
+
+def read_json(path):
+    try:
+        with open(path, 'r') as file:
+            return json.load(file)
+    except (FileNotFoundError, json.JSONDecodeError):
+        return None
+
+def write_json(data, path):
+    #write to a temporary file first so an interrupted run never leaves a half-written file
+    with open(path + '.tmp', 'w') as file:
+        json.dump(data, file, indent = 1)
+    os.replace(path + '.tmp', path)
+
+def read_manifest(folder = '.'):
+    #{file name: [size, modified time]} of the files in the cache
+    manifest = read_json(os.path.join(folder, CACHE_FOLDER, MANIFEST_FILE))
+    if manifest is None or manifest.get('columns') != VISA_COLUMNS or manifest.get('format') != CACHE_FORMAT \
+            or manifest.get('partitions') != PARTITIONS:
+        return {}
+    return manifest['sources']
+
+def write_manifest(sources, folder = '.'):
+    write_json({'columns': VISA_COLUMNS, 'format': CACHE_FORMAT, 'partitions': PARTITIONS, 'sources': sources},
+               os.path.join(folder, CACHE_FOLDER, MANIFEST_FILE))
+
+def read_feather(path, columns = None):
+    #memory-map a cache file
+    return feather.read_table(path, columns = columns, memory_map = True)
+
+def check_schema(path):
+    #only read the header row, so a wrong file is caught before any slow parsing
+    header = pd.read_csv(path, encoding='latin', nrows = 0).columns
+    missing = [col for col in VISA_COLUMNS if col not in header]
+    if missing:
+        raise ValueError('%s is missing the columns %s.' % (os.path.basename(path), ', '.join(missing)))
+
+def normalize_title(title):
+    #the key used for a job title in the visa report (same as the titles shown to the user)
+    return str(title).upper().strip()
+
+def encode(values):
+    '''
+    Dictionary-encode a column: returns (codes, strings) where codes is an integer array with the position of every
+    value in strings, the array of distinct values. Missing values get the last position, where strings has NaN.
+    '''
+    if isinstance(values.dtype, pd.CategoricalDtype): #already encoded
+        codes, strings = values.cat.codes.to_numpy(), values.cat.categories.to_numpy(dtype = object)
+    else:
+        codes, strings = pd.factorize(values)
+        strings = np.asarray(strings, dtype = object)
+    codes = np.where(codes < 0, len(strings), codes)
+    return codes, np.append(strings, np.nan)
+
+def new_pair_counts():
+    #running case counts of (title, employer) pairs, added to one chunk of rows at a time (see add_pair_counts):
+    #every title and employer gets a code the first time it is seen, and a pair is stored as one number made of both codes.
+    #'rows' maps each pair to its row of 'keys' and 'counts', whose first 'size' rows are used (the rest is room to grow)
+    return {'titles': {}, 'employers': {}, 'rows': {}, 'size': 0,
+            'keys': np.zeros(0, dtype = np.int64), 'counts': np.zeros((0, len(COUNT_COLUMNS)), dtype = np.int64)}
+
+def vocabulary_codes(vocabulary, strings):
+    #the codes of strings in vocabulary, adding the new ones; only called with the distinct strings of a chunk
+    return np.array([vocabulary.setdefault(string, len(vocabulary)) for string in strings], dtype = np.int64)
+
+def add_pair_counts(pair_counts, visa_data):
+    #add the case counts of the rows in visa_data; the memory used depends on the rows and the number of pairs, not on the rows seen before
+    #missing titles become 'NAN', like str(nan).upper() did when the rows were compared one by one
+    title_codes, titles = encode(visa_data['JOB_TITLE'])
+    #titles are upper-cased once per distinct title; titles that become the same get the same code
+    title_codes = vocabulary_codes(pair_counts['titles'], [normalize_title(t) for t in titles])[title_codes]
+    employer_codes, employers = encode(visa_data['EMPLOYER_NAME'])
+    employer_codes = vocabulary_codes(pair_counts['employers'], list(employers[:-1]) + [None])[employer_codes] #None for a missing employer
+    status_codes, statuses = encode(visa_data['CASE_STATUS'])
+
+    #one code per (title, employer) pair of the chunk, numbered in order of first appearance
+    pair_codes, pair_keys = pd.factorize((title_codes << 32) | employer_codes)
+    counts = np.zeros((len(pair_keys), len(COUNT_COLUMNS)), dtype = np.int64)
+    counts[:, 0] = np.bincount(pair_codes, minlength = len(pair_keys))
+    for i, status in enumerate(('Certified', 'Withdrawn', 'Denied'), 1):
+        rows = (statuses == status)[status_codes] #rows with this status, found by comparing the distinct statuses only
+        counts[:, i] = np.bincount(pair_codes, weights = rows, minlength = len(pair_keys))
+
+    #the pairs seen before keep their row, the new ones are added after them; only the pairs of this chunk are looked up,
+    #so adding a chunk costs the same however many pairs were seen before
+    rows = pair_counts['rows']
+    positions = np.fromiter(map(rows.get, pair_keys.tolist(), itertools.repeat(-1)), dtype = np.int64, count = len(pair_keys))
+    new = np.flatnonzero(positions < 0)
+    size = pair_counts['size']
+    positions[new] = np.arange(size, size + len(new))
+    rows.update(zip(pair_keys[new].tolist(), range(size, size + len(new))))
+    if size + len(new) > len(pair_counts['keys']): #twice the room needed, so the arrays are only copied a few times
+        room = 2 * (size + len(new))
+        pair_counts['keys'] = np.resize(pair_counts['keys'], room)
+        pair_counts['counts'] = np.concatenate([pair_counts['counts'][:size], np.zeros((room - size, len(COUNT_COLUMNS)), dtype = np.int64)])
+    pair_counts['keys'][positions[new]] = pair_keys[new]
+    pair_counts['counts'][positions] += counts #the pairs of a chunk are distinct, so no row is added to twice
+    pair_counts['size'] = size + len(new)
+    return pair_counts
+
+def pair_table(pair_counts):
+    #the pair counts as a table with the columns title, employer and COUNT_COLUMNS, in order of first appearance
+    titles = np.array(list(pair_counts['titles']), dtype = object)
+    employers = np.array([np.nan if e is None else e for e in pair_counts['employers']], dtype = object)
+    keys = pair_counts['keys'][:pair_counts['size']]
+    pairs = pd.DataFrame({'title': titles[keys >> 32], 'employer': employers[keys & 0xFFFFFFFF]})
+    for i, col in enumerate(COUNT_COLUMNS):
+        pairs[col] = pair_counts['counts'][:pair_counts['size'], i]
+    return pairs
+
+def combine_pairs(pair_tables):
+    #add up the pair counts of several quarters
+    pairs = pd.concat(pair_tables, ignore_index = True)
+    return pairs.groupby(['title', 'employer'], sort = False, dropna = False)[COUNT_COLUMNS].sum().reset_index()
+
+def combine_employers(employer_tables):
+    #add up the total and certified cases of every employer in several tables, in order of first appearance
+    employers = pd.concat([table for table in employer_tables if table is not None], ignore_index = True)
+    return employers.groupby('employer', sort = False)[['total', 'certified']].sum().reset_index()
+
+def title_partition(title):
+    #the partition of a job title; crc32 gives the same number in every process, unlike hash()
+    return zlib.crc32(title.encode('utf-8')) % PARTITIONS
+
+def spill_path(folder, name, kind):
+    return cache_path(folder, name, kind + ('.pkl' if pa is None else '.feather'))
+
+def open_spill(path, columns):
+    '''
+    Open a cache file that tables with the given columns are added to one at a time (see add_spill), so a table
+    larger than the memory can be saved in parts. The file is an Arrow file, or pickled tables without pyarrow.
+    '''
+    if pa is None:
+        return {'path': path, 'columns': columns, 'file': open(path + '.tmp', 'wb'), 'empty': True}
+    schema = pa.schema([(col, pa.large_string() if col in ('title', 'employer') else pa.int64()) for col in columns])
+    return {'path': path, 'columns': columns, 'schema': schema, 'file': pa.ipc.new_file(path + '.tmp', schema), 'empty': True}
+
+def add_spill(spill, table):
+    if pa is None:
+        pickle.dump(table[spill['columns']], spill['file'], protocol = pickle.HIGHEST_PROTOCOL)
+    else:
+        spill['file'].write_table(pa.Table.from_pandas(table[spill['columns']], schema = spill['schema'], preserve_index = False))
+    spill['empty'] = False
+
+def close_spill(spill):
+    if pa is None and spill['empty']: #an empty table, so reading the file gives its columns
+        pickle.dump(pd.DataFrame(columns = spill['columns']), spill['file'])
+    spill['file'].close()
+    os.replace(spill['path'] + '.tmp', spill['path'])
+
+def read_spill(path):
+    #all the tables added to a cache file, as one table
+    if pa is not None:
+        return read_feather(path).to_pandas()
+    tables = []
+    with open(path, 'rb') as file:
+        while True:
+            try:
+                tables.append(pickle.load(file))
+            except EOFError:
+                break
+    return pd.concat(tables, ignore_index = True)
+
+def save_pairs(pair_counts, spills, employers):
+    '''
+    Add the pair counts to the partition files (each pair to the partition of its title) and their cases to the
+    employer totals. Returns the new employer totals.
+    '''
+    pairs = pair_table(pair_counts)
+    title_codes, titles = pd.factorize(pairs['title'])
+    partitions = np.array([title_partition(title) for title in titles], dtype = np.int64)[title_codes]
+    for partition in np.unique(partitions):
+        add_spill(spills[partition], pairs[partitions == partition])
+    return combine_employers([employers, pairs[['employer', 'total', 'certified']]])
+
+def remove_cache(folder, name):
+    #delete every cache file of a source file (including the files of older cache formats)
+    for path in glob.glob(glob.escape(cache_path(folder, name, '')) + '*'):
+        os.remove(path)
+
+def parse_quarter(path, folder, chunk_rows = None):
+    '''
+    Parse one source file in a worker process, one chunk at a time. The pair counts of the chunks are added up
+    until there are as many pairs as rows in a chunk, then saved to the file's partition files, so the memory used
+    depends on the chunk size and not on the size of the file. The employer totals are saved at the end.
+    Returns the number of rows.
+    '''
+    name = os.path.basename(path)
+    chunk_rows = chunk_rows or CHUNK_ROWS
+    remove_cache(folder, name)
+    spills = [open_spill(spill_path(folder, name, 'pairs%d' % partition), ['title', 'employer'] + COUNT_COLUMNS)
+              for partition in range(PARTITIONS)]
+    employers = None
+    pair_counts = new_pair_counts()
+    rows = 0
+    for chunk in read_lca_chunks(path, chunk_rows):
+        add_pair_counts(pair_counts, chunk)
+        rows += len(chunk)
+        if pair_counts['size'] >= chunk_rows:
+            employers = save_pairs(pair_counts, spills, employers)
+            pair_counts = new_pair_counts()
+    employers = save_pairs(pair_counts, spills, employers)
+    for spill in spills:
+        close_spill(spill)
+    spill = open_spill(spill_path(folder, name, 'employers'), ['employer', 'total', 'certified'])
+    add_spill(spill, employers)
+    close_spill(spill)
+    return rows
+
+def run_parallel(function, files, folder, workers = None):
+    #run function(file, folder) for every file, one process per file up to the number of cores
+    workers = min(len(files), workers or os.cpu_count() or 1)
+    if workers <= 1:
+        return [function(f, folder) for f in files]
+    #a forked process copies the locks held by every other thread (e.g. the warm-up threads or the threads of
+    #careerService.py) and can wait on them forever, so new processes are started instead when other threads are running
+    context = multiprocessing.get_context('spawn') if threading.active_count() > 1 else None
+    with ProcessPoolExecutor(max_workers = workers, mp_context = context) as pool:
+        return list(pool.map(function, files, [folder] * len(files)))
+
+def update_cache(folder = '.', workers = None):
+    '''
+    Bring the cache up to date with the source files: parse the new or changed files
+    (checked for the needed columns, then in parallel) and delete the cache of removed files.
+    Returns the manifest of the cached files. Threads calling it at the same time update the cache one after the other.
+    '''
+    with cache_lock:
+        return refresh_cache(folder, workers)
+
+def find_sources(folder):
+    #the source files, raising FileNotFoundError if there are none
+    files = source_files(folder)
+    if not files:
+        raise FileNotFoundError('No LCA data files (%s) found in %s.' % (LCA_PATTERN, os.path.abspath(folder)))
+    return files
+
+def refresh_cache(folder, workers):
+    files = find_sources(folder)
+    os.makedirs(os.path.join(folder, CACHE_FOLDER), exist_ok = True)
+
+    manifest = read_manifest(folder)
+    current = {os.path.basename(f): file_signature(f) for f in files}
+    outdated = [f for f in files if manifest.get(os.path.basename(f)) != current[os.path.basename(f)]]
+    removed = [name for name in manifest if name not in current]
+    if not outdated and not removed:
+        return manifest
+
+    for f in outdated:
+        check_schema(f)
+    if outdated:
+        ds.say('\nExtracting visa sponsorship data to your system (%d new or changed file(s)).' % len(outdated))
+        ds.say('Do not delete the \'%s\' folder to save time on your next usage.' % CACHE_FOLDER)
+        ds.say('-'*50+ '\n')
+    with prof.stage('visa: parse quarters', workers = True) as record:
+        record['rows'] = sum(run_parallel(parse_quarter, outdated, folder, workers))
+
+    for name in removed:
+        remove_cache(folder, name)
+
+    #the manifest lists the files in name order, which is also the order their rows are stacked in
+    manifest = {name: current[name] for name in sorted(current)}
+    write_manifest(manifest, folder)
+    if outdated:
+        ds.say('Extracted successfully.')
+        ds.say('-'*50+ '\n')
+    return manifest
+
+def parse_without_cache(folder, temp):
+    #without pyarrow nothing is kept between runs: the source files are parsed into a temporary folder, one at a time
+    files = find_sources(folder)
+    os.makedirs(os.path.join(temp, CACHE_FOLDER))
+    for path in files:
+        parse_quarter(path, temp)
+    return [os.path.basename(path) for path in files]
+
+def partition_pairs(folder, names, partition):
+    #the pair counts of one partition of the given source files, added up in the order of names
+    return combine_pairs([read_spill(spill_path(folder, name, 'pairs%d' % partition)) for name in names])
+
+def build_report(folder, names):
+    '''
+    Compute the visa report of every title of the given source files, one partition at a time, so only the pair
+    counts of one partition are in memory with the report. Returns (report, number of pairs).
+    '''
+    report = {}
+    pairs = 0
+    for partition in range(PARTITIONS):
+        table = partition_pairs(folder, names, partition)
+        report.update(build_title_report(table))
+        pairs += len(table)
+    return report, pairs
+
+def load_employers(folder, names):
+    #the total and certified cases of every employer of the given source files, added up one file at a time
+    employers = None
+    for name in names:
+        employers = combine_employers([employers, read_spill(spill_path(folder, name, 'employers'))])
+    return employers
+
+def build_title_report(pairs, titles = None):
+    '''
+    Compute the visa report of every title in pairs (or only of the given titles). Returns a dictionary of
+    {title: {'total', 'certified', 'withdrawn', 'denied': int, 'employers': [(employer, cases)]}}
+    '''
+    if titles is not None:
+        pairs = pairs[pairs['title'].isin(titles)]
+    counts = pairs.groupby('title', sort = False)[COUNT_COLUMNS].sum().astype(int)
+
+    #a stable sort by cases keeps the employers' order of first appearance for ties
+    employers = pairs.dropna(subset = ['employer']).sort_values('total', ascending = False, kind = 'stable')
+    employers = employers.groupby('title', sort = False).head(TOP_EMPLOYERS)
+    top = {}
+    for title, employer, cases in zip(employers['title'], employers['employer'], employers['total']):
+        top.setdefault(title, []).append((employer, int(cases)))
+
+    report = {}
+    for title, row in zip(counts.index, counts.itertuples(index = False)):
+        report[title] = {'total': row.total, 'certified': row.certified, 'withdrawn': row.withdrawn,
+                         'denied': row.denied, 'employers': top.get(title, [])}
+    return report
+
+def read_report(folder = '.'):
+    try:
+        with open(os.path.join(folder, CACHE_FOLDER, REPORT_FILE), 'rb') as file:
+            return pickle.load(file)
+    except (FileNotFoundError, EOFError, pickle.UnpicklingError):
+        return None
+
+def write_report(saved, folder = '.'):
+    path = os.path.join(folder, CACHE_FOLDER, REPORT_FILE)
+    with open(path + '.tmp', 'wb') as file:
+        pickle.dump(saved, file, protocol = pickle.HIGHEST_PROTOCOL)
+    os.replace(path + '.tmp', path)
+
+def update_report(saved, manifest, folder = '.'):
+    #add the source files that are new since the report was saved, updating only the titles they contain
+    added = [name for name in manifest if name not in saved['sources']]
+    touched = set()
+    pairs = 0
+    for partition in range(PARTITIONS):
+        titles = set().union(*[read_spill(spill_path(folder, name, 'pairs%d' % partition))['title'] for name in added])
+        if titles: #the pairs of every file are combined in the manifest order, so the top employers with the same
+            #number of cases are in the same order as when the report is computed from every file
+            table = partition_pairs(folder, list(manifest), partition)
+            saved['titles'].update(build_title_report(table, titles))
+            touched |= titles
+            pairs += len(table)
+    tm.add_titles(saved['index'], touched)
+    return {'sources': manifest, 'titles': saved['titles'], 'index': saved['index']}, pairs
+
+def load_visa_report(folder = '.'):
+    '''
+    Load the per-title visa report and the title index, keeping both up to date with the source files.
+    Returns (report, index) where report is {title: counts} (see build_title_report).
+    '''
+    if feather is None:
+        with tempfile.TemporaryDirectory() as temp:
+            report, pairs = build_report(temp, parse_without_cache(folder, temp))
+        return report, tm.build_title_index(report.keys())
+
+    with cache_lock:
+        return refresh_report(folder)
+
+def refresh_report(folder):
+    manifest = update_cache(folder)
+    with prof.stage('visa: read report'):
+        saved = read_report(folder)
+    if saved is not None and saved['sources'] == manifest:
+        ds.say('\nVisa data successfully loaded.')
+        ds.say('-'*50+ '\n')
+        return saved['titles'], saved['index']
+
+    only_added = saved is not None and all(manifest.get(name) == sig for name, sig in saved['sources'].items())
+    with prof.stage('visa: build report') as record:
+        if only_added:
+            saved, record['rows'] = update_report(saved, manifest, folder)
+        else: #a quarter was changed or removed, so the report is computed again from every quarter's counts
+            report, record['rows'] = build_report(folder, list(manifest))
+            saved = {'sources': manifest, 'titles': report, 'index': tm.build_title_index(report.keys())}
+    write_report(saved, folder)
+    return saved['titles'], saved['index']
@@ -0,0 +1,94 @@
+'''
+Description: This is the helper program that downloads web pages and files for \
+the other utilities and keeps a copy on disk.
+
+Each downloaded URL is saved in the 'web_cache' folder as the raw response \
+('<key>.body') and its details ('<key>.json': URL, ETag, Last-Modified, and \
+when it was last checked). The key is a hash of the URL.
+
+    - If the copy was checked less than ttl seconds ago, it is used without \
+contacting the server.
+    - Otherwise the server is asked with a conditional request (If-None-Match / \
+If-Modified-Since). If the server answers 304 Not Modified, the copy is used \
+and only its check time is updated.
+    - If the server cannot be reached, the copy is used no matter how old it is.
+
+'''
+
+import os
+import json
+import time
+import hashlib
+import requests
+
+CACHE_FOLDER = 'web_cache'
+
+def cache_key(url):
+    return hashlib.sha1(url.encode('utf-8')).hexdigest()
+
+def body_path(url, folder = CACHE_FOLDER):
+    #the file holding the saved copy of url (e.g. to open a saved PDF directly)
+    return os.path.join(folder, cache_key(url) + '.body')
+
+def read_entry(url, folder = CACHE_FOLDER):
+    #return (details, body) of the saved copy of url, or (None, None) if there is none
+    path = os.path.join(folder, cache_key(url))
+    try:
+        with open(path + '.json', 'r') as file:
+            details = json.load(file)
+        with open(path + '.body', 'rb') as file:
+            body = file.read()
+    except (FileNotFoundError, json.JSONDecodeError):
+        return None, None
+    return details, body
+
+def write_entry(url, details, body = None, folder = CACHE_FOLDER):
+    #save the details (and the body, if given); temporary files keep an interrupted run from leaving half a copy
+    os.makedirs(folder, exist_ok = True)
+    path = os.path.join(folder, cache_key(url))
+    if body is not None:
+        with open(path + '.body.tmp', 'wb') as file:
+            file.write(body)
+        os.replace(path + '.body.tmp', path + '.body')
+    with open(path + '.json.tmp', 'w') as file:
+        json.dump(details, file, indent = 1)
+    os.replace(path + '.json.tmp', path + '.json')
+
+def fetch(url, ttl = 0, folder = CACHE_FOLDER, timeout = 30, session = None):
+    '''
+    Return (body, status) for url, where status is:
+        'cached': the saved copy was used without contacting the server (checked within ttl, or server unreachable)
+        'not modified': the server confirmed the saved copy is current
+        'downloaded': a new copy was downloaded and saved
+    Raises requests.RequestException if the server cannot be reached and there is no saved copy.
+    '''
+    details, body = read_entry(url, folder)
+    now = time.time()
+    if details is not None and now - details['checked'] < ttl:
+        return body, 'cached'
+
+    headers = {}
+    if details is not None: #ask the server to only send the page if it changed
+        if details.get('etag'):
+            headers['If-None-Match'] = details['etag']
+        if details.get('last_modified'):
+            headers['If-Modified-Since'] = details['last_modified']
+
+    try:
+        response = (session or requests).get(url, headers = headers, timeout = timeout)
+        if response.status_code != 304:
+            response.raise_for_status()
+    except requests.RequestException:
+        if details is None:
+            raise
+        return body, 'cached' #offline: the last saved copy is better than nothing
+
+    if response.status_code == 304:
+        details['checked'] = now
+        write_entry(url, details, folder = folder)
+        return body, 'not modified'
+
+    details = {'url': url, 'etag': response.headers.get('ETag'),
+               'last_modified': response.headers.get('Last-Modified'), 'checked': now}
+    write_entry(url, details, response.content, folder)
+    return response.content, 'downloaded'